@@ -0,0 +1,142 @@
+"""
+This module caches the AI server's answers by report content.
+
+Reports with the same category, message and image get the same answer, so
+the answer is looked up by a digest of those three (normalized) before the
+AI server is asked. Recent answers are kept in an in-process LRU; all of
+them are kept in the ai_responses table, which survives restarts and is
+shared by every worker process.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import AIResponse
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _normalize(text: Optional[str]) -> str:
+
+    return " ".join((text or "").split()).casefold()
+
+
+def image_digest(image_url: Optional[str]) -> str:
+    """
+    Content hash of a report image.
+
+    Stored images are named after the SHA-256 of their bytes, so the digest
+    is read from the object name; other URLs are hashed as they are.
+    """
+    if not image_url:
+        return ""
+
+    name = os.path.basename(urlparse(image_url).path).split(".")[0].split("_")[0]
+    if DIGEST_PATTERN.match(name):
+        return name
+
+    return hashlib.sha256(image_url.encode()).hexdigest()
+
+
+def cache_key(category: Optional[str], message: Optional[str], image_url: Optional[str]) -> str:
+    """
+    Digest of the normalized (category, message, image hash) of a report.
+    """
+    parts = (_normalize(category), _normalize(message), image_digest(image_url))
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class AIResponseCache:
+    """
+    Two level cache of AI answers: an in-process LRU in front of the
+    ai_responses table.
+
+    Args:
+        session_factory: Creates the AsyncSession used for the table.
+        max_entries (int): Answers kept in memory.
+        max_rows (int): Answers kept in the table; the least recently used
+            rows are deleted beyond it.
+    """
+
+    def __init__(self, session_factory, max_entries: int = 1024, max_rows: int = 100000):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.memory_hits = 0
+        self.table_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _remember(self, key: str, response: str) -> None:
+
+        with self.lock:
+            self.entries[key] = response
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached answer for key, or None on a miss.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return self.entries[key]
+
+        async with self.session_factory() as db:
+            record = await db.get(AIResponse, key)
+
+            if record is None:
+                with self.lock:
+                    self.misses += 1
+                return None
+
+            record.last_used = datetime.utcnow()
+            response = record.response
+            await db.commit()
+
+        with self.lock:
+            self.table_hits += 1
+        self._remember(key, response)
+        return response
+
+    async def put(self, key: str, response: str) -> None:
+        """
+        Store an answer in memory and in the table.
+        """
+        self._remember(key, response)
+
+        async with self.session_factory() as db:
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            statement = dialect.insert(AIResponse).values(key=key, response=response, last_used=datetime.utcnow())
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[AIResponse.key],
+                set_={"response": statement.excluded.response, "last_used": statement.excluded.last_used},
+            ))
+
+            stale = select(AIResponse.key).order_by(AIResponse.last_used.desc()).offset(self.max_rows)
+            await db.execute(delete(AIResponse).where(AIResponse.key.in_(stale.scalar_subquery())))
+            await db.commit()
+
+    def stats(self) -> dict:
+
+        with self.lock:
+            hits = self.memory_hits + self.table_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "table_hits": self.table_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,381 @@
+"""
+Async variants of the crud actions, for use with an AsyncSession.
+
+Queries and row formatting are built by app.queries; this module only runs
+them on an AsyncSession.
+"""
+from typing import List
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Fire, Report
+from app.src.types import FIRE, PositionArray
+from app.crud import add_point, report_added, touch_date
+from app.queries import (
+    STREAM_BATCH,
+    FeatureChunks,
+    apply_report_update,
+    bbox_collection,
+    bbox_queries,
+    cluster_queries,
+    date_of,
+    day_queries,
+    feature_json,
+    fire_batch_rows,
+    fire_batch_statements,
+    fire_collection,
+    new_fire,
+    new_report,
+    parse_date,
+    raw_report_insert,
+    report_properties,
+    report_range_query,
+    stored_dates_queries,
+)
+
+
+async def post_fire(db: AsyncSession, data: object):
+    """
+    Create and store a new fire.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        data (object): The fire data.
+
+    Returns:
+        Fire: The created fire.
+    """
+    db_fire = new_fire(data)
+    db.add(db_fire)
+    await db.commit()
+    await db.refresh(db_fire)
+    add_point(date_of(db_fire.acq_date), db_fire.longitude, db_fire.latitude, db_fire.id, FIRE)
+    return db_fire
+
+
+async def post_fire_batch(db: AsyncSession, records: List[dict]) -> dict:
+    """
+    Upsert many fires in one transaction, keyed by country_id.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        records (list): Validated fire records (schemas.FireCreate dumps).
+
+    Returns:
+        dict: The number of records received, the number of rows written
+            and the ids of those rows, in submission order.
+    """
+    rows = fire_batch_rows(records)
+
+    if not rows:
+        return {"received": len(records), "upserted": 0, "ids": []}
+
+    dates = {row["acq_date"] for row in rows}
+
+    for query in stored_dates_queries(rows):
+        dates.update(await db.scalars(query))
+
+    try:
+        stored = {}
+        for statement in fire_batch_statements(db.bind.dialect.name, rows):
+            stored.update((country_id, fire_id) for country_id, fire_id in await db.execute(statement))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    for date in dates:
+        if date is not None:
+            touch_date(date_of(date))
+
+    ids = [stored[row["country_id"]] for row in rows]
+    return {"received": len(records), "upserted": len(ids), "ids": ids}
+
+
+async def get_fire(db: AsyncSession, fire_id: int):
+    """
+    Retrieve fire data by its unique ID.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        fire_id (int): The unique ID of the fire to retrieve.
+
+    Returns:
+        dict: A GeoJSON representation of the fire data.
+    """
+    data = await db.scalar(select(Fire).where(Fire.id == fire_id))
+    return fire_collection(data)
+
+
+async def get_fire_raw_by_date(db: AsyncSession, date: str):
+    """
+    Retrieve the id and position of the fires of a date.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        date (str): The date for which to retrieve fire data.
+
+    Returns:
+        list: {"id", "position"} dictionaries.
+    """
+    result = await db.stream(
+        select(Fire.id, Fire.longitude, Fire.latitude)
+        .where(Fire.acq_date == parse_date(date))
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+
+    return [
+        {"id": fire_id, "position": [float(longitude), float(latitude)]}
+        async for fire_id, longitude, latitude in result
+    ]
+
+
+async def get_cluster_points(db: AsyncSession, start: str, end: str = None):
+    """
+    Load the fires and fire reports between two dates as arrays for clustering.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        start (str): The first date of the range, inclusive.
+        end (str): The last date of the range, inclusive; defaults to start.
+
+    Returns:
+        tuple: A PositionArray of every point with its id and source, and an
+        array with the date of each point.
+    """
+    ids, coords, sources, dates = [], [], [], []
+
+    for query, source in cluster_queries(start, end):
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH))
+
+        async for rows in result.partitions():
+            for row_id, longitude, latitude, day in rows:
+                ids.append(row_id)
+                coords.append((longitude, latitude))
+                dates.append(date_of(day))
+            sources.extend([source] * len(rows))
+
+    points = PositionArray(coords, ids, sources)
+
+    return points, np.array(dates, dtype=str)
+
+
+def stream_fire_by_date(db: AsyncSession, date: str):
+    """
+    Serialize the fires and fire reports of a date as a GeoJSON
+    FeatureCollection, chunk by chunk, while reading rows from the cursor.
+
+    The date is parsed and both statements are built before anything is
+    streamed, so a bad date raises here instead of inside the response.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        date (str): The date for which to retrieve fire data.
+
+    Returns:
+        AsyncIterator[str]: Consecutive pieces of the FeatureCollection document.
+    """
+    fire_query, report_query = day_queries(date)
+    return _stream_features(db, fire_query, report_query)
+
+
+async def _stream_features(db: AsyncSession, fire_query, report_query):
+
+    chunks = FeatureChunks()
+
+    yield chunks.HEAD
+
+    async for longitude, latitude in await db.stream(fire_query):
+        piece = chunks.add(feature_json(longitude, latitude, {}))
+        if piece:
+            yield piece
+
+    async for report in await db.stream(report_query):
+        piece = chunks.add(feature_json(report.longitude, report.latitude, report_properties(report)))
+        if piece:
+            yield piece
+
+    piece = chunks.flush()
+    if piece:
+        yield piece
+
+    yield chunks.TAIL
+
+
+async def get_fire_by_bbox(db: AsyncSession, date: str, bbox: tuple):
+    """
+    Retrieve the fires and fire reports of a date inside a bounding box as GeoJSON.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        date (str): The date for which to retrieve fire data.
+        bbox (tuple): (min_lon, min_lat, max_lon, max_lat); min_lon > max_lon
+            crosses the antimeridian.
+
+    Returns:
+        dict: A GeoJSON representation of the retrieved fire data.
+    """
+    fire_query, report_query = bbox_queries(date, bbox)
+
+    fires = (await db.scalars(fire_query)).all()
+    reports = (await db.scalars(report_query)).all()
+
+    return bbox_collection(fires, reports)
+
+
+async def post_report(db: AsyncSession, report_data: object, image_url: str = None,
+                      thumbnail_url: str = None, preview_url: str = None):
+    """
+    Create and store a new report in the database.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        report_data (object): The report data, including latitude, longitude, message, etc.
+        image_url (str): The URL of the stored image.
+        thumbnail_url (str): The URL of the stored 256px thumbnail.
+        preview_url (str): The URL of the stored 1024px version.
+
+    Returns:
+        Report: The created report object stored in the database.
+    """
+    db_report = new_report(report_data, image_url, thumbnail_url, preview_url)
+    db.add(db_report)
+    await db.commit()
+    await db.refresh(db_report)
+    report_added(db_report)
+    return db_report
+
+
+async def get_report(db: AsyncSession):
+    """
+    Retrieve every report from the database.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+
+    Returns:
+        list: The reports.
+    """
+    return (await db.scalars(select(Report))).all()
+
+
+async def get_report_by_id(db: AsyncSession, report_id: int):
+    """
+    Retrieve a report by its unique ID from the database.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        report_id (int): The unique ID of the report to retrieve.
+
+    Returns:
+        Report: The report data corresponding to the given report ID.
+    """
+    return await db.scalar(select(Report).where(Report.id == report_id))
+
+
+async def get_report_by_date(db: AsyncSession, date: str, only_fire: bool = False):
+
+    return await get_report_by_range(db, date, date, only_fire)
+
+
+async def get_report_by_range(db: AsyncSession, start_date: str, end_date: str, only_fire: bool = False):
+    """
+    Retrieve the reports created between two dates, both inclusive.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        start_date (str): The first date of the range.
+        end_date (str): The last date of the range.
+        only_fire (bool): Only return reports in the fire-report category.
+
+    Returns:
+        list: The matching reports.
+    """
+    return (await db.scalars(report_range_query(start_date, end_date, only_fire))).all()
+
+
+async def update_report(db: AsyncSession, report_id: int, report_data: object, image_url: str = None,
+                        thumbnail_url: str = None, preview_url: str = None):
+    """
+    Update a report by its unique ID from the database.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        report_id (int): The unique ID of the report to update.
+        report_data (object): The fields to change; None values are kept.
+        image_url (str): The URL of a newly stored image.
+        thumbnail_url (str): The URL of its 256px thumbnail.
+        preview_url (str): The URL of its 1024px version.
+
+    Returns:
+        Report: The updated report.
+    """
+    existing_report = await db.scalar(select(Report).where(Report.id == report_id))
+    if existing_report is None:
+        raise HTTPException(status_code=404, detail="Report with not found")
+
+    apply_report_update(existing_report, report_data, image_url, thumbnail_url, preview_url)
+    await db.commit()
+
+    await db.refresh(existing_report)
+    touch_date(date_of(existing_report.timestamp))
+    return existing_report
+
+
+async def set_ai_message(db: AsyncSession, report_id: int, ai_message: str) -> bool:
+    """
+    Store the AI message of a report.
+
+    Only ai_message changes, so cached clusters and tiles stay valid.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        report_id (int): The unique ID of the report.
+        ai_message (str): The message to store.
+
+    Returns:
+        bool: False if the report does not exist.
+    """
+    result = await db.execute(update(Report).where(Report.id == report_id).values(ai_message=ai_message))
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def get_report_by_lonlat(db: AsyncSession, lon: float, lat: float):
+
+    return (await db.scalars(select(Report).where(Report.longitude == lon).where(Report.latitude == lat))).all()
+
+
+async def update_report_with_raw(db: AsyncSession, date: str) -> int:
+    """
+    Create a NASA report for every fire of a date that does not have one yet.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+        date (str): The date of the fires, formatted as YYYY-MM-DD.
+
+    Returns:
+        int: The number of reports inserted.
+    """
+    day = parse_date(date)
+    result = await db.execute(raw_report_insert(day))
+    await db.commit()
+
+    if result.rowcount:
+        touch_date(date_of(day))
+
+    return result.rowcount
+
+
+async def get_manual_report(db: AsyncSession):
+    """
+    Retrieve the reports that were not imported from NASA.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async database session.
+
+    Returns:
+        list: The reports.
+    """
+    return (await db.scalars(select(Report).where(Report.from_nasa == False))).all()
@@ -0,0 +1,127 @@
+"""
+This module contains the in-process cache for clustering results.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+from app import config
+
+
+class ClusterCache:
+    """
+    LRU cache of cluster results keyed by (date, threshold, sources).
+
+    Entries for a date are dropped whenever a fire or report on that date is
+    changed, so cached results never outlive the rows they were built from.
+    Newly created points are inserted into incremental entries instead.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, float, Hashable], object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.inserts = 0
+        self.generations: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def generation(self, date: str) -> int:
+        """
+        Return a counter that changes every time date is invalidated.
+
+        Read it before computing a result and pass it to put, so a result
+        built from rows that changed meanwhile is not stored.
+        """
+        with self.lock:
+            return self.generations.get(date, 0)
+
+    def get(self, key: Tuple[str, float, Hashable]):
+        """
+        Return the cached value for key, or None on a miss.
+        """
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key: Tuple[str, float, Hashable], value: object, generation: int = None) -> None:
+        """
+        Store value under key, evicting the least recently used entries.
+        """
+        with self.lock:
+            if generation is not None and generation != self.generations.get(key[0], 0):
+                return
+
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, date: str) -> int:
+        """
+        Drop every entry computed for date and return how many were dropped.
+        """
+        with self.lock:
+            self.generations[date] = self.generations.get(date, 0) + 1
+            stale = [key for key in self.entries if key[0] == date]
+            for key in stale:
+                del self.entries[key]
+
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def insert(self, date: str, position) -> int:
+        """
+        Add one new point to every cached result for date that covers its
+        source, dropping entries that cannot be updated in place.
+
+        Returns how many entries were updated.
+        """
+        with self.lock:
+            self.generations[date] = self.generations.get(date, 0) + 1
+            updated = 0
+
+            for key in [key for key in self.entries if key[0] == date]:
+
+                if position.source not in key[2]:
+                    continue
+
+                value = self.entries[key]
+
+                if getattr(value, "INCREMENTAL", False):
+                    if value.insert(position) is not None:
+                        updated += 1
+                else:
+                    del self.entries[key]
+                    self.invalidations += 1
+
+            self.inserts += updated
+            return updated
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and current size of the cache.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "inserts": self.inserts,
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+            }
+
+
+cluster_cache = ClusterCache(config.Settings().CLUSTER_CACHE_SIZE)
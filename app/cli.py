@@ -0,0 +1,34 @@
+"""
+Command line entry point of the backend.
+
+Usage:
+    nasa-backend ingest firms.csv [more.csv ...] [--chunk-size N]
+"""
+import argparse
+from typing import List, Optional
+from app import models  # noqa: F401 (registers the tables on Base)
+from app.database import create_tables, engine
+from app.ingest import CHUNK_SIZE, ingest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(prog="nasa-backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Bulk load NASA FIRMS CSV files into the fires table.")
+    ingest_parser.add_argument("files", nargs="+", help="FIRMS CSV files (MODIS or VIIRS).")
+    ingest_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                               help=f"CSV rows parsed and loaded at a time (default {CHUNK_SIZE}).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        create_tables()
+        ingest(engine, args.files, chunk_size=args.chunk_size)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
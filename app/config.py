@@ -2,9 +2,31 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     MAP_KEY: str
+    FIRMS_STATUS_URL: str = "https://firms.modaps.eosdis.nasa.gov/mapserver/mapkey_status/"
+    FIRMS_REFRESH_INTERVAL: float = 300
+    FIRMS_TIMEOUT: float = 10
     DATABASE_URL: str
     S3_ENDPOINT_URL: str
     S3_BUCKET_NAME: str
     S3_ACCESS_KEY_ID: str
     S3_SECRET_ACCESS_KEY: str
+    S3_POOL_SIZE: int = 10
+    CLUSTER_CACHE_SIZE: int = 128
+    TILE_DIR: str = "tiles"
+    TILE_MAX_ZOOM: int = 10
+    AI_SERVER_URL: str = "http://10.3.25.2:8000"
+    AI_CONCURRENCY: int = 4
+    AI_QUEUE_SIZE: int = 100
+    AI_HEALTH_INTERVAL: float = 30
+    AI_TIMEOUT: float = 120
+    AI_CACHE_SIZE: int = 1024
+    AI_CACHE_MAX_ROWS: int = 100000
+    JOB_STORE: str = "memory"
+    JOB_TTL: float = 3600
+    JOB_MAX_ENTRIES: int = 10000
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     model_config = SettingsConfigDict(env_file=".env")
\ No newline at end of file
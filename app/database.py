@@ -4,19 +4,68 @@ This module contains database-related functionality and configuration.
 It defines the SQLAlchemy database engine, session factory, and other database-related settings.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app import config
+from app.metrics import instrument_engine, timed_pool
+from app.migrations import migrate
 
 settings = config.Settings()
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+def pool_options(url) -> dict:
+    """
+    Engine keyword arguments for the configured connection pool.
+
+    Pools that do not queue connections (SQLite in memory) only get the
+    checkout timing.
+    """
+    url = make_url(url)
+    pool_class = url.get_dialect().get_pool_class(url)
+    options = {"poolclass": timed_pool(pool_class), "pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if issubclass(pool_class, QueuePool):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    return options
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    **pool_options(SQLALCHEMY_DATABASE_URL)
 )
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used by the async engine for each backend.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_url(url: str):
+    """
+    Point a database URL at the async driver of its backend.
+    """
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+async_engine = create_async_engine(
+    async_url(SQLALCHEMY_DATABASE_URL),
+    **pool_options(async_url(SQLALCHEMY_DATABASE_URL))
+)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def create_tables():
-	Base.metadata.create_all(bind=engine)
\ No newline at end of file
+	Base.metadata.create_all(bind=engine)
+	migrate(engine)
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+This module asks the AI server to describe new reports and stores the answer.
+
+Reports are queued and handled by a fixed number of asyncio workers sharing
+one keep-alive HTTP client. The AI server's health is checked at most once
+per interval, and the answer is written straight to the report's
+ai_message column. Answers are looked up in an AIResponseCache first, so a
+report repeating an earlier one never reaches the AI server, and identical
+reports handled at the same time share a single request.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from uuid import UUID
+import httpx
+from app import async_crud
+from app.ai_cache import AIResponseCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+# Stored when the AI server is unreachable or does not answer.
+DEFAULT_MESSAGE = "To prevent flames, consider the following steps:\n\n1. Ensure p. Maintain clear surroundings: Keep the area around the structure clear of dls: Choose fire-resistant materials for construction and clothing to minimiznguish fires quickly, reducing the damage and risk to life.\n5. Regular mainn good working order.\n"
+
+# Fields of a report sent to the AI server.
+PAYLOAD_FIELDS = ("longitude", "latitude", "message", "category", "id", "image_url", "timestamp")
+
+COMPLETED = "completed"
+FAILED = "failed"
+REJECTED = "rejected"
+
+
+class EnrichmentWorker:
+    """
+    Bounded queue of reports waiting for an AI message, and the tasks
+    draining it.
+
+    Args:
+        url (str): Base URL of the AI server; empty to always store
+            DEFAULT_MESSAGE.
+        session_factory: Creates the AsyncSession used to store answers.
+        concurrency (int): Reports handled at the same time.
+        queue_size (int): Reports allowed to wait; submit refuses more.
+        health_interval (float): Seconds a health check result is reused.
+        timeout (float): Seconds allowed for one AI request.
+        on_status (callable): Awaited with (job id, status) when a job
+            changes state.
+        transport (httpx.AsyncBaseTransport): Transport for the HTTP
+            client, to talk to a stub server in tests.
+        cache (AIResponseCache): Answers of earlier reports; None to always
+            ask the AI server.
+    """
+
+    def __init__(self, url: str, session_factory, concurrency: int = 4, queue_size: int = 100,
+                 health_interval: float = 30, timeout: float = 120,
+                 on_status: Optional[Callable[[UUID, str], Awaitable[None]]] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[AIResponseCache] = None):
+        self.url = url.rstrip("/")
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.health_interval = health_interval
+        self.timeout = timeout
+        self.on_status = on_status
+        self.transport = transport
+        self.cache = cache
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.client: Optional[httpx.AsyncClient] = None
+        self.tasks = []
+        self.healthy = False
+        self.checked_at = float("-inf")
+        self.health_lock: Optional[asyncio.Lock] = None
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.counters: Dict[str, int] = {COMPLETED: 0, FAILED: 0, REJECTED: 0, "fallbacks": 0}
+
+    async def start(self) -> None:
+        """
+        Open the HTTP client and start the worker tasks.
+        """
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.health_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            transport=self.transport,
+        )
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """
+        Cancel the worker tasks and close the HTTP client.
+
+        Reports still queued are dropped; their ai_message stays empty.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def join(self) -> None:
+        """
+        Wait until every queued report has been handled.
+        """
+        await self.queue.join()
+
+    async def submit(self, uid: UUID, report: dict) -> bool:
+        """
+        Queue a report for enrichment.
+
+        Args:
+            uid (UUID): The job id reported to on_status.
+            report (dict): The report fields; "id" is required.
+
+        Returns:
+            bool: False if the queue is full and the report was not queued.
+        """
+        payload = {field: report.get(field) for field in PAYLOAD_FIELDS}
+
+        try:
+            self.queue.put_nowait((uid, payload))
+        except asyncio.QueueFull:
+            self.counters[REJECTED] += 1
+            await self._status(uid, REJECTED)
+            return False
+
+        return True
+
+    def stats(self) -> dict:
+
+        return {
+            **self.counters,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "healthy": self.healthy,
+            "concurrency": self.concurrency,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def is_healthy(self) -> bool:
+        """
+        Whether the AI server answered its last health check, checking
+        again once health_interval has passed.
+        """
+        if not self.url:
+            return False
+
+        async with self.health_lock:
+            if time.monotonic() - self.checked_at < self.health_interval:
+                return self.healthy
+
+            try:
+                response = await self.client.get(self.url)
+                self.healthy = response.is_success
+            except httpx.HTTPError:
+                self.healthy = False
+
+            self.checked_at = time.monotonic()
+            return self.healthy
+
+    async def describe(self, payload: dict) -> str:
+        """
+        Ask the AI server for the message of a report, or DEFAULT_MESSAGE if
+        it is unhealthy or the request fails.
+
+        Cached answers are returned without contacting the server; fallbacks
+        are not cached. Reports with the same cache key share one lookup:
+        while it is in flight, later ones wait for its answer.
+        """
+        key = cache_key(payload.get("category"), payload.get("message"), payload.get("image_url"))
+
+        pending = self.pending.get(key)
+        if pending is not None:
+            message = await asyncio.shield(pending)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[key] = future
+            message = None
+            try:
+                message = await self._lookup(key, payload)
+            finally:
+                del self.pending[key]
+                future.set_result(message)
+
+        if message is None:
+            self.counters["fallbacks"] += 1
+            return DEFAULT_MESSAGE
+
+        return message
+
+    async def _lookup(self, key: str, payload: dict) -> Optional[str]:
+
+        if self.cache is not None:
+            message = await self.cache.get(key)
+            if message is not None:
+                return message
+
+        if not await self.is_healthy():
+            return None
+
+        try:
+            response = await self.client.post(f"{self.url}/api/llava", json=payload)
+            response.raise_for_status()
+            message = response.json().get("response")
+        except (httpx.HTTPError, ValueError, AttributeError):
+            logger.warning("AI request for report %s failed", payload.get("id"), exc_info=True)
+            return None
+
+        if not message:
+            return None
+
+        if self.cache is not None:
+            await self.cache.put(key, message)
+
+        return message
+
+    async def _work(self) -> None:
+
+        while True:
+            uid, payload = await self.queue.get()
+
+            try:
+                message = await self.describe(payload)
+
+                async with self.session_factory() as db:
+                    await async_crud.set_ai_message(db, payload["id"], message)
+
+                self.counters[COMPLETED] += 1
+                await self._status(uid, COMPLETED)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Enriching report %s failed", payload.get("id"))
+                self.counters[FAILED] += 1
+                await self._status(uid, FAILED)
+            finally:
+                self.queue.task_done()
+
+    async def _status(self, uid: UUID, status: str) -> None:
+
+        if self.on_status is None:
+            return
+
+        try:
+            await self.on_status(uid, status)
+        except Exception:
+            logger.exception("Recording job %s as %s failed", uid, status)
@@ -1,60 +1,191 @@
-from app.src.readers import AlgoReader
+import math
+import threading
+from collections import defaultdict
+
+from app.src.readers import AlgoReader, ARRAY
 from app.src.mst import Graph
+from app.src.cluster import threshold_labels, groups_from_labels
+from app.src.unionfind import DisjointSet
+from app.src.types import FIRE, REPORT, Position, PositionArray
+
+THRESHOLD = 0.2
 
 class Group:
 
-    def __init__(self, reader: AlgoReader) -> None:
+    def __init__(self, reader: AlgoReader, engine: str = "grid", threshold: float = THRESHOLD,
+                 incremental: bool = False) -> None:
         
         self.READER = reader
-        self.THRESHOLD = 0.2
+        self.ENGINE = engine
+        self.THRESHOLD = threshold
+        self.INCREMENTAL = incremental
         self.DISTANCE = []
         self.POSITIONS = []
         self.GROUPS = []
 
+        # Incremental state: union-find over point indices, a grid of
+        # THRESHOLD-sized cells, the (source, id) of every point, points
+        # inserted since the last rebuild and the memoized cluster summary.
+        self.SETS = None
+        self.INDEX = None
+        self.KNOWN = set()
+        self.ADDED = []
+        self.RESULT = None
+        self.LOCK = threading.Lock()
+
     def gen(self):
 
-        self.POSITIONS = self.READER.get_data()
+        self.POSITIONS = self.READER.get_array()
 
-        size = len(self.POSITIONS)
-        self.DISTANCE = [[0 for _ in range(size)] for _ in range(size)]
-        self.IS_MARKED = [False for _ in range(size)]
+        if self.ENGINE == "mst":
+            labels = self._mst_labels()
+        elif self.ENGINE == "grid":
+            labels = threshold_labels(self.POSITIONS.coords, self.THRESHOLD)
+        else:
+            raise ValueError(f"unknown clustering engine: {self.ENGINE}")
 
-        for i in range(len(self.POSITIONS)):
-            for j in range(i + 1, len(self.POSITIONS)):
+        if self.INCREMENTAL:
+            self._index(labels)
 
-                distance = self.POSITIONS[i] - self.POSITIONS[j]
-                self.DISTANCE[i][j] = distance
-                self.DISTANCE[j][i] = distance
+        return self._build_groups(labels)
 
-        graph = Graph(size)
-        graph.graph = self.DISTANCE
+    def _mst_labels(self):
 
-        results = graph.primMST()
+        size = len(self.POSITIONS)
+        graph = Graph(self.POSITIONS)
+        self.DISTANCE = graph.graph
 
-        self.GROUPS = [[pos] for pos in self.POSITIONS]
+        results = graph.primMST()
 
-        parent_group = None
-        child_group = None
+        sets = DisjointSet(size)
 
         for result in results:
 
             parent, child, weight = result
 
             if weight < self.THRESHOLD:
-                
-                for group in self.GROUPS:
+                sets.union(parent, child)
+
+        return sets.labels()
 
-                    if self.POSITIONS[parent] in group:
-                        parent_group = group
+    def _build_groups(self, labels):
 
-                    if self.POSITIONS[child] in group:
-                        child_group = group
+        self.GROUPS = [self.POSITIONS.take(indices) for indices in groups_from_labels(labels)]
 
-                parent_group += child_group
-                self.GROUPS.remove(child_group)
-                        
         return self.GROUPS
 
+    def _cell(self, x: float, y: float):
+
+        return (math.floor(x / self.THRESHOLD), math.floor(y / self.THRESHOLD))
+
+    def _index(self, labels):
+
+        self.SETS = DisjointSet(len(labels))
+        self.INDEX = defaultdict(list)
+        self.ADDED = []
+
+        first = {}
+
+        for i, label in enumerate(labels.tolist()):
+            if label in first:
+                self.SETS.union(first[label], i)
+            else:
+                first[label] = i
+
+        for i, (x, y) in enumerate(self.POSITIONS.coords.tolist()):
+            self.INDEX[self._cell(x, y)].append((i, x, y))
+
+        if self.POSITIONS.ids is not None and self.POSITIONS.sources is not None:
+            self.KNOWN = set(zip(self.POSITIONS.sources.tolist(), self.POSITIONS.ids.tolist()))
+        else:
+            self.KNOWN = set()
+
+    def insert(self, position: Position) -> int:
+        """
+        Add one point to an incremental Group, merging it only with the
+        points closer than THRESHOLD in the neighboring grid cells.
+
+        A point whose (source, id) is already in the Group, e.g. a row that
+        was committed before the Group was read from the database, is
+        skipped and None is returned.
+        """
+        if not self.INCREMENTAL:
+            raise ValueError("insert requires an incremental Group")
+
+        with self.LOCK:
+
+            if self.SETS is None:
+                self.gen()
+
+            key = (position.source, position.id)
+            if position.id is not None and key in self.KNOWN:
+                return None
+
+            x, y = float(position.x), float(position.y)
+            cx, cy = self._cell(x, y)
+            index = self.SETS.add()
+
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for other, ox, oy in self.INDEX.get((cx + dx, cy + dy), ()):
+                        if math.sqrt((x - ox) ** 2 + (y - oy) ** 2) < self.THRESHOLD:
+                            self.SETS.union(index, other)
+
+            self.INDEX[(cx, cy)].append((index, x, y))
+            if position.id is not None:
+                self.KNOWN.add(key)
+            self.ADDED.append(position)
+            self.RESULT = None
+
+            return index
+
+    def _refresh(self):
+
+        if self.ADDED:
+            self.POSITIONS = PositionArray.concatenate([
+                self.POSITIONS,
+                PositionArray.from_positions(self.ADDED)
+            ])
+            self.ADDED = []
+
+        return self._build_groups(self.SETS.labels())
+
+    def clusters(self):
+
+        with self.LOCK:
+
+            if self.RESULT is not None:
+                return self.RESULT
+
+            if self.INCREMENTAL and self.SETS is not None:
+                groups = self._refresh()
+            else:
+                groups = self.gen()
+
+            result = []
+
+            for group in groups:
+
+                result.append({
+                    "center": group.center(),
+                    "positions": group.coords.tolist(),
+                    "id": group.select(FIRE).tolist(),
+                    "report_id": group.select(REPORT).tolist()
+                })
+
+            if self.INCREMENTAL:
+                self.RESULT = result
+
+            return result
+
+def cluster_positions(key, positions: PositionArray, threshold: float = THRESHOLD):
+    """
+    Cluster one batch of points and return it tagged with key.
+
+    Defined at module level so it can be sent to a process pool.
+    """
+    return key, Group(ARRAY(positions), threshold=threshold).clusters()
+
 
 if __name__ == "__main__":
 
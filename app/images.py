@@ -0,0 +1,73 @@
+"""
+This module turns an uploaded photo into the renditions stored for a report.
+
+The photo is decoded once, rotated upright from its EXIF orientation and
+re-encoded as a full-size JPEG plus smaller thumbnails, so map and list
+views can load a few kilobytes instead of the original.
+"""
+import io
+from typing import BinaryIO, Dict
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+CONTENT_TYPE = "image/jpeg"
+
+FULL_QUALITY = 85
+THUMBNAIL_QUALITY = 80
+
+# (report column, longest side in pixels), largest first: each thumbnail is
+# scaled down from the previous one.
+THUMBNAILS = [
+    ("preview_url", 1024),
+    ("thumbnail_url", 256),
+]
+
+
+def _rgb(image: Image.Image) -> Image.Image:
+
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render(file: BinaryIO) -> Dict[str, bytes]:
+    """
+    Decode an image and encode every rendition of it.
+
+    Args:
+        file (BinaryIO): The uploaded image, in any format Pillow reads.
+
+    Returns:
+        dict: JPEG bytes keyed by report column: image_url for the full-size
+            image, then one entry per THUMBNAILS size.
+
+    Raises:
+        ValueError: If the file is not an image Pillow can decode, or has
+            more pixels than Pillow's decompression bomb limit.
+    """
+    try:
+        with Image.open(file) as original:
+            image = _rgb(ImageOps.exif_transpose(original))
+    except Image.DecompressionBombError as error:
+        raise ValueError("The uploaded image is too large") from error
+    except (UnidentifiedImageError, OSError) as error:
+        raise ValueError("The uploaded file is not a supported image") from error
+
+    renditions = {"image_url": _encode(image, FULL_QUALITY)}
+
+    for column, size in THUMBNAILS:
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        renditions[column] = _encode(image, THUMBNAIL_QUALITY)
+
+    return renditions
@@ -0,0 +1,193 @@
+"""
+This module bulk loads NASA FIRMS CSV files into the fires table.
+
+Files are parsed with pandas in chunks. On PostgreSQL every chunk is streamed
+into a temporary table with COPY and merged with one INSERT ... ON CONFLICT
+statement; other databases fall back to an executemany upsert.
+"""
+import io
+import time
+from typing import Iterable, List, Set
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app import tiles
+from app.src.grid import cells_of
+
+CHUNK_SIZE = 50000
+
+COLUMNS = [
+    "country_id",
+    "latitude",
+    "longitude",
+    "brightness",
+    "scan",
+    "track",
+    "acq_date",
+    "acq_time",
+    "confidence",
+    "bright_t31",
+    "frp",
+    "daynight",
+    "cell",
+]
+
+# VIIRS files name the brightness channels differently from MODIS files.
+ALIASES = {
+    "bright_ti4": "brightness",
+    "bright_ti5": "bright_t31",
+}
+
+STAGING_TABLE = "fires_ingest"
+
+UPSERT = (
+    f"INSERT INTO fires ({', '.join(COLUMNS)}) "
+    "{source} "
+    "ON CONFLICT (country_id) DO UPDATE SET "
+    + ", ".join(f"{column} = EXCLUDED.{column}" for column in COLUMNS if column != "country_id")
+)
+
+
+def normalize(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map a chunk of a FIRMS CSV onto the columns of the fires table.
+
+    Rows without coordinates are dropped. Files that carry no country_id
+    column get one built from the detection itself (position, date and
+    time), so re-ingesting the same file updates rows instead of
+    duplicating them. Non-numeric confidence levels (VIIRS l/n/h) are
+    stored as NULL.
+    """
+    chunk = chunk.rename(columns=ALIASES)
+    chunk = chunk.dropna(subset=["latitude", "longitude"])
+
+    frame = pd.DataFrame(index=chunk.index)
+
+    for column in ("latitude", "longitude", "brightness", "scan", "track", "bright_t31", "frp"):
+        frame[column] = pd.to_numeric(chunk.get(column), errors="coerce")
+
+    for column in ("acq_time", "confidence"):
+        frame[column] = pd.to_numeric(chunk.get(column), errors="coerce").astype("Int64")
+
+    frame["acq_date"] = pd.to_datetime(chunk["acq_date"]).dt.strftime("%Y-%m-%d")
+    frame["daynight"] = chunk.get("daynight")
+
+    if "country_id" in chunk:
+        frame["country_id"] = chunk["country_id"].astype(str)
+    else:
+        frame["country_id"] = (
+            frame["latitude"].map("{:.5f}".format) + "_"
+            + frame["longitude"].map("{:.5f}".format) + "_"
+            + frame["acq_date"] + "_"
+            + frame["acq_time"].astype(str)
+        )
+
+    frame["cell"] = cells_of(frame["longitude"].to_numpy(), frame["latitude"].to_numpy())
+
+    return frame[COLUMNS]
+
+
+def _copy_chunk(connection, frame: pd.DataFrame) -> None:
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        cursor.execute(UPSERT.format(
+            source=f"SELECT DISTINCT ON (country_id) {', '.join(COLUMNS)} FROM {STAGING_TABLE}"
+        ))
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+
+def _load_postgresql(engine: Engine, chunks: Iterable[pd.DataFrame], report) -> int:
+
+    connection = engine.raw_connection()
+    loaded = 0
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+                f"SELECT {', '.join(COLUMNS)} FROM fires WITH NO DATA"
+            )
+
+        for frame in chunks:
+            _copy_chunk(connection, frame)
+            loaded += len(frame)
+            report(loaded)
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    return loaded
+
+
+def _load_executemany(engine: Engine, chunks: Iterable[pd.DataFrame], report) -> int:
+
+    statement = text(UPSERT.format(
+        source="VALUES (" + ", ".join(f":{column}" for column in COLUMNS) + ")"
+    ))
+    loaded = 0
+
+    with engine.begin() as connection:
+        for frame in chunks:
+            rows = frame.astype(object).where(frame.notna(), None).to_dict("records")
+            connection.execute(statement, rows)
+            loaded += len(frame)
+            report(loaded)
+
+    return loaded
+
+
+def ingest(engine: Engine, paths: List[str], chunk_size: int = CHUNK_SIZE, out=print) -> int:
+    """
+    Upsert every detection of the given FIRMS CSV files into fires.
+
+    Stored vector tiles of the dates that were loaded are deleted so they
+    get rebuilt. Servers that are already running keep their cached
+    clusters for those dates until the entries are evicted or invalidated.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine of the target database.
+        paths (list): The CSV files to load.
+        chunk_size (int): The number of CSV rows parsed and loaded at a time.
+        out (callable): Receives progress messages.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    dates: Set[str] = set()
+    started = time.perf_counter()
+
+    def chunks():
+        for path in paths:
+            for chunk in pd.read_csv(path, chunksize=chunk_size):
+                frame = normalize(chunk)
+                dates.update(frame["acq_date"].dropna().unique().tolist())
+                yield frame
+
+    def report(loaded: int):
+        elapsed = time.perf_counter() - started
+        out(f"{loaded} rows loaded, {loaded / elapsed if elapsed else 0:.0f} rows/sec")
+
+    if engine.dialect.name == "postgresql":
+        loaded = _load_postgresql(engine, chunks(), report)
+    else:
+        loaded = _load_executemany(engine, chunks(), report)
+
+    for date in sorted(dates):
+        tiles.invalidate(date)
+
+    elapsed = time.perf_counter() - started
+    out(f"done: {loaded} rows in {elapsed:.1f}s ({loaded / elapsed if elapsed else 0:.0f} rows/sec)")
+
+    return loaded
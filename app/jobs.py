@@ -0,0 +1,147 @@
+"""
+This module keeps the status of background jobs so clients can poll them.
+
+Two stores share one async interface: MemoryJobStore for a single worker
+process, and SqlJobStore, which keeps jobs in the database so every uvicorn
+worker sees them. Both forget jobs once they are older than their TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, select
+from app.models import JobRecord
+
+IN_PROGRESS = "in_progress"
+
+
+class Job(BaseModel):
+    uid: UUID = Field(default_factory=uuid4)
+    status: str = IN_PROGRESS
+    report_id: Optional[int] = None
+
+
+class MemoryJobStore:
+    """
+    In-process job store, bounded by age and by number of jobs.
+
+    Args:
+        ttl (float): Seconds a job is kept after its last update.
+        max_entries (int): Jobs kept at most; the least recently updated
+            are dropped first.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[UUID, Tuple[Job, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+
+        while self.entries:
+            uid, (_, updated) = next(iter(self.entries.items()))
+            if now - updated < self.ttl and len(self.entries) <= self.max_entries:
+                return
+            del self.entries[uid]
+
+    async def create(self, report_id: int = None) -> Job:
+
+        job = Job(report_id=report_id)
+        now = time.monotonic()
+
+        with self.lock:
+            self.entries[job.uid] = (job, now)
+            self._expire(now)
+
+        return job
+
+    async def get(self, uid: UUID) -> Optional[Job]:
+
+        now = time.monotonic()
+
+        with self.lock:
+            self._expire(now)
+            entry = self.entries.get(uid)
+            return entry[0].model_copy() if entry else None
+
+    async def set_status(self, uid: UUID, status: str) -> None:
+
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.pop(uid, None)
+            if entry is not None:
+                entry[0].status = status
+                self.entries[uid] = (entry[0], now)
+            self._expire(now)
+
+
+class SqlJobStore:
+    """
+    Job store in the jobs table, shared by every process using the database.
+
+    Jobs are only bounded by age: expired rows are ignored on read and
+    deleted whenever a job is created.
+
+    Args:
+        session_factory: Creates the AsyncSession used for every call.
+        ttl (float): Seconds a job is kept after its last update.
+    """
+
+    def __init__(self, session_factory, ttl: float = 3600):
+        self.session_factory = session_factory
+        self.ttl = ttl
+
+    def _cutoff(self) -> datetime:
+
+        return datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    async def create(self, report_id: int = None) -> Job:
+
+        job = Job(report_id=report_id)
+
+        async with self.session_factory() as db:
+            await db.execute(delete(JobRecord).where(JobRecord.updated_at < self._cutoff()))
+            db.add(JobRecord(uid=str(job.uid), status=job.status, report_id=report_id,
+                             updated_at=datetime.utcnow()))
+            await db.commit()
+
+        return job
+
+    async def get(self, uid: UUID) -> Optional[Job]:
+
+        async with self.session_factory() as db:
+            record = await db.scalar(
+                select(JobRecord)
+                .where(JobRecord.uid == str(uid))
+                .where(JobRecord.updated_at >= self._cutoff())
+            )
+
+        if record is None:
+            return None
+
+        return Job(uid=UUID(record.uid), status=record.status, report_id=record.report_id)
+
+    async def set_status(self, uid: UUID, status: str) -> None:
+
+        async with self.session_factory() as db:
+            record = await db.get(JobRecord, str(uid))
+            if record is not None:
+                record.status = status
+                record.updated_at = datetime.utcnow()
+                await db.commit()
+
+
+def create_job_store(kind: str, session_factory, ttl: float, max_entries: int):
+    """
+    Build the job store selected by the JOB_STORE setting ("memory" or "sql").
+    """
+    if kind == "sql":
+        return SqlJobStore(session_factory, ttl)
+    if kind == "memory":
+        return MemoryJobStore(ttl, max_entries)
+    raise ValueError(f"Unknown job store: {kind}")
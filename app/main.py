@@ -1,32 +1,43 @@
 """
 This module contains FastAPI endpoints for handling fire reports and images.
 """
-import os
 import asyncio
-from functools import lru_cache
+from datetime import timedelta
 import json
-import requests
 from typing import List
 import uvicorn
 from concurrent.futures.process import ProcessPoolExecutor
-from fastapi import Depends, FastAPI, UploadFile, File, Form, BackgroundTasks
+from fastapi import Depends, FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing_extensions import Annotated
-from typing import Dict
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.map import get_transaction_count
-from app.database import SessionLocal
-from app import crud
+from app.map import TransactionCounter
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app import async_crud, crud, queries
+from app import schemas
 from app import config
-from app.group import Group
-from app.src.readers import INPUT
-from app.s3 import store_image
+from app import tiles
+from app.group import Group, THRESHOLD, cluster_positions
+from app.cache import cluster_cache
+from app.metrics import MetricsMiddleware, db_metrics, pool_status
+from app.src.readers import ARRAY
+from app.src.types import FIRE, REPORT
+from app.s3 import store_upload
+from app.ai_cache import AIResponseCache
+from app.enrichment import EnrichmentWorker
+from app.jobs import create_job_store
 from app.database import create_tables
 
-from uuid import UUID, uuid4
-from pydantic import BaseModel, Field
+from uuid import UUID
+from pydantic import TypeAdapter, ValidationError
 
-AI_SERVER_URL = os.environ.get("AI_SERVER_URL", "http://10.3.25.2:8000")
+settings = config.Settings()
+MAX_RANGE_DAYS = 366
+TILE_BUILD_ATTEMPTS = 3
+MAX_FIRE_BATCH = 50000
+
+fire_batch = TypeAdapter(List[schemas.FireCreate])
 
 app = FastAPI()
 
@@ -39,64 +50,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 create_tables()
 
-class Job(BaseModel):
-    uid: UUID = Field(default_factory=uuid4)
-    status: str = "in_progress"
-    result: int = None
+jobs = create_job_store(settings.JOB_STORE, AsyncSessionLocal, settings.JOB_TTL, settings.JOB_MAX_ENTRIES)
+# Tile builds are serialized per date through a fixed set of locks, so the
+# set does not grow with the number of dates ever requested.
+TILE_LOCK_STRIPES = 64
+tile_locks = [asyncio.Lock() for _ in range(TILE_LOCK_STRIPES)]
+
+enrichment = EnrichmentWorker(
+    settings.AI_SERVER_URL,
+    AsyncSessionLocal,
+    concurrency=settings.AI_CONCURRENCY,
+    queue_size=settings.AI_QUEUE_SIZE,
+    health_interval=settings.AI_HEALTH_INTERVAL,
+    timeout=settings.AI_TIMEOUT,
+    on_status=jobs.set_status,
+    cache=AIResponseCache(AsyncSessionLocal, settings.AI_CACHE_SIZE, settings.AI_CACHE_MAX_ROWS),
+)
 
-jobs: Dict[UUID, Job] = {}
+transactions = TransactionCounter(
+    settings.FIRMS_STATUS_URL,
+    settings.MAP_KEY,
+    interval=settings.FIRMS_REFRESH_INTERVAL,
+    timeout=settings.FIRMS_TIMEOUT,
+)
 
 async def run_in_process(fn, *args):
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(app.state.executor, fn, *args)  # wait and return result
 
 
-def get_ai_reponse(data: dict):
-        
-        try:
-            r = requests.get(AI_SERVER_URL)
-
-            if not r.ok:
-                raise requests.exceptions.ConnectionError
-
-            r = requests.post(
-                f"{AI_SERVER_URL}/api/llava",
-                json.dumps({
-                    "longitude": data.get('longitude'),
-                    "latitude": data.get('latitude'),
-                    "message": data.get('message'),
-                    "category": data.get('category'),
-                    "id": data.get('id'),
-                    "image_url": data.get('image_url'),
-                    "timestamp": data.get('timestamp')
-                }),
-                headers={
-                    "accept": "application/json",
-                    "Content-Type": "application/json"
-                }
-            )
-
-            try:
-                DEFAULT_MSG = r.json().get("response")
-            except:
-                pass
-
-        except requests.exceptions.ConnectionError:
-            DEFAULT_MSG = "To prevent flames, consider the following steps:\n\n1. Ensure p. Maintain clear surroundings: Keep the area around the structure clear of dls: Choose fire-resistant materials for construction and clothing to minimiznguish fires quickly, reducing the damage and risk to life.\n5. Regular mainn good working order.\n"
-
-            
-        data['ai_message'] = DEFAULT_MSG
-
-        requests.patch(
-            f"http://localhost:8000/api/report/{data.get('id')}",
-            data
-        )
+def canonical_date(date: str, name: str = "date") -> str:
+    """
+    Parse a YYYY-MM-DD path parameter and return it zero-padded, the form
+    cached clusters and tiles are keyed and invalidated by.
 
+    strptime also accepts "2023-10-1"; caching under that spelling would
+    never be invalidated. Malformed dates are answered with 400.
+    """
+    try:
+        return queries.parse_date(date).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be formatted as YYYY-MM-DD")
 
-async def start_ai_task(uid: UUID, data: dict) -> None:
-    jobs[uid].result = await run_in_process(get_ai_reponse, data)
 
 def get_db():
     """
@@ -114,28 +112,41 @@ def get_db():
     finally:
         db.close()
 
-@lru_cache()
-def get_settings():
+async def get_async_db():
     """
-    Get the env settings.
+    Create an async database session and yield it for use in FastAPI dependencies.
+
+    Used by the async routes so that queries do not block the event loop.
     """
-    return config.Settings()
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 @app.get("/")
-async def count(settings: Annotated[config.Settings, Depends(get_settings)]):
+async def count():
     """
     Get the transaction count.
 
-    Parameters:
-    - settings: Annotated[config.Settings, Depends(get_settings)] - The application settings.
+    The count is refreshed from FIRMS in the background every
+    FIRMS_REFRESH_INTERVAL seconds; this returns the cached value.
 
     Returns:
     dict: A dictionary with a message and transaction count.
     """
-    transaction_count = get_transaction_count(settings.MAP_KEY)
+    transaction_count = await transactions.count()
     return {"message": "Hello World", "transaction count": transaction_count}
 
+@app.get("/api/transactions", response_model=None)
+async def get_transaction_stats():
+    """
+    Get the state of the cached FIRMS transaction count.
+
+    Returns:
+    dict: The cached count, its age in seconds (None before the first
+    successful fetch) and the number of failed refreshes.
+    """
+    return transactions.stats()
+
 @app.post("/api/fire", response_model=None)
 def post_fire(
     latitude:float = Form(...),
@@ -168,143 +179,318 @@ def post_fire(
     report_data = crud.post_fire(db, report_data)
     return report_data
 
+@app.post("/api/fire/batch", response_model=None)
+async def post_fire_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Upsert many fires at once, keyed by country_id.
+
+    The body is either a JSON array or newline-delimited JSON of
+    schemas.FireCreate records. Every record is validated before anything
+    is written, and all of them are written in one transaction.
+
+    Parameters:
+    - request (Request): The request carrying the records.
+    - db (AsyncSession): The database session to use.
+
+    Returns:
+    dict: The number of records received and upserted, and the fire ids.
+    """
+    body = await request.body()
+    too_large = HTTPException(status_code=413, detail=f"at most {MAX_FIRE_BATCH} fires per batch")
+
+    try:
+        if body.lstrip().startswith(b"["):
+            items = json.loads(body)
+        else:
+            lines = [line for line in body.splitlines() if line.strip()]
+            if len(lines) > MAX_FIRE_BATCH:
+                raise too_large
+            items = [json.loads(line) for line in lines]
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=f"invalid JSON: {error}")
+
+    # Counted before validation, so an oversized batch is not validated.
+    if isinstance(items, list) and len(items) > MAX_FIRE_BATCH:
+        raise too_large
+
+    try:
+        records = fire_batch.validate_python(items)
+    except ValidationError as error:
+        raise HTTPException(status_code=422, detail=json.loads(error.json(include_url=False)))
+
+    return await async_crud.post_fire_batch(db, [record.model_dump() for record in records])
+
+@app.get("/api/fire", response_model=None)
+async def get_fire_by_bbox(bbox: str, date: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the fires and fire reports of a date inside a viewport.
+
+    Parameters:
+    - bbox (str): The viewport as "minLon,minLat,maxLon,maxLat".
+    - date (str): The date of the fire data to retrieve.
+    - db (AsyncSession): The database session to use.
+
+    Returns:
+    dict: A GeoJSON FeatureCollection of the fires inside the viewport.
+    """
+    date = canonical_date(date)
+
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
+
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="minLat must not be greater than maxLat")
+
+    fire_data = await async_crud.get_fire_by_bbox(db, date, (min_lon, min_lat, max_lon, max_lat))
+    return fire_data
+
+@app.get("/api/fire/raw", response_model=None)
+async def get_raw_fire_by_range(start: str, end: str, merge: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cluster fires and fire reports for every day between two dates.
+
+    Days are clustered in parallel on the process pool and streamed back as
+    newline-delimited JSON, one {"date", "clusters"} object per day as soon
+    as it finishes. With merge=true the whole window is clustered at once
+    and reported under the date "start/end".
+
+    Parameters:
+    - start (str): The first date of the range, inclusive.
+    - end (str): The last date of the range, inclusive.
+    - merge (bool): Cluster the window as a single batch.
+    - db (AsyncSession): The database session to use.
+    """
+    start, end = canonical_date(start, "start"), canonical_date(end, "end")
+    first, last = queries.parse_date(start), queries.parse_date(end)
+
+    if last < first or (last - first).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range must cover 1 to {MAX_RANGE_DAYS} days")
+
+    points, dates = await async_crud.get_cluster_points(db, start, end)
+
+    if merge:
+        batches = {f"{start}/{end}": points}
+    else:
+        batches = {}
+
+        for i in range((last - first).days + 1):
+            date = (first + timedelta(days=i)).isoformat()
+            batches[date] = points.take(dates == date)
+
+    async def stream():
+
+        pending = []
+
+        for date, day_points in batches.items():
+
+            groups = None if merge else cluster_cache.get((date, THRESHOLD, (FIRE, REPORT)))
+
+            if groups is not None:
+                yield json.dumps({"date": date, "clusters": groups.clusters()}) + "\n"
+                continue
+
+            if len(day_points) == 0:
+                yield json.dumps({"date": date, "clusters": []}) + "\n"
+                continue
+
+            pending.append(run_in_process(cluster_positions, date, day_points))
+
+        for done in asyncio.as_completed(pending):
+            date, clusters = await done
+            yield json.dumps({"date": date, "clusters": clusters}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.get("/api/fire/{fire_id}", response_model=None)
-async def get_fire(fire_id: int, db: Session = Depends(get_db)):
+async def get_fire(fire_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get fire data by its ID.
 
     Parameters:
     - fire_id (int): The ID of the fire data to retrieve.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing fire data.
     """
-    fire_data = crud.get_fire(db, fire_id)
+    fire_data = await async_crud.get_fire(db, fire_id)
     return fire_data
 
 @app.get("/api/fire/date/{date}", response_model=None)
-async def get_fire_by_date(date: str, db: Session = Depends(get_db)):
+async def get_fire_by_date(date: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get fire data by date.
 
     Parameters:
     - date (str): The date of the fire data to retrieve.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
-    dict: A dictionary containing fire data.
+    StreamingResponse: A GeoJSON FeatureCollection, streamed as it is read.
     """
-    fire_data = crud.get_fire_by_date(db, date)
-    return fire_data
+    date = canonical_date(date)
+    return StreamingResponse(async_crud.stream_fire_by_date(db, date), media_type="application/json")
 
 @app.get("/api/fire/raw/{date}", response_model=None)
-async def get_raw_fire(date: str, db: Session = Depends(get_db)):
+async def get_raw_fire(date: str, db: AsyncSession = Depends(get_async_db)):
 
-    positions: List[List[int, int]] = []
+    date = canonical_date(date)
+    key = (date, THRESHOLD, (FIRE, REPORT))
+    groups = cluster_cache.get(key)
+    if groups is not None:
+        return groups.clusters()
 
-    fires = crud.get_fire_raw_by_date(db, date)
+    generation = cluster_cache.generation(date)
 
-    for fire in fires:
-        positions.append(fire.get("position"))
+    points, _ = await async_crud.get_cluster_points(db, date)
 
-    reports = crud.get_report_by_date(db, date, True)
+    groups = Group(ARRAY(points), incremental=True)
+    result = groups.clusters()
 
-    for report in reports:
-        try:
-            positions.append([float(report.longitude), float(report.latitude)])
-        except ValueError:
-            pass
+    cluster_cache.put(key, groups, generation)
+    return result
 
-    if len(positions) == 0:
-        return []
 
-    groups = Group(INPUT(positions))
-    result = []
+@app.get("/api/cache/cluster", response_model=None)
+async def get_cluster_cache_stats():
+    """
+    Get hit/miss counters of the cluster result cache.
 
-    for group in groups.gen():
+    Returns:
+    dict: A dictionary containing cache counters and size.
+    """
+    return cluster_cache.stats()
 
-        ids = []
-        xs = [pos.x for pos in group]
-        ys = [pos.y for pos in group]
 
-        for location in group:
+@app.get("/api/metrics/db", response_model=None)
+async def get_db_metrics():
+    """
+    Get database usage counters and connection pool occupancy.
 
-            loc = [location.x, location.y]
+    Returns:
+    dict: Query counts, query time and pool checkout waits, in total and
+    per route, plus the state of the sync and async pools.
+    """
+    return {
+        **db_metrics.stats(),
+        "pools": {
+            "sync": pool_status(engine.pool),
+            "async": pool_status(async_engine.pool),
+        },
+    }
 
-            for fire in fires:
 
-                if fire.get("position") == loc:
-                    ids.append(fire.get("id"))
-                    break
+async def build_day_tiles(date: str, db: AsyncSession) -> None:
+    """
+    Build and publish the tile pyramid of date on the process pool, once.
+    """
+    lock = tile_locks[hash(date) % TILE_LOCK_STRIPES]
 
-        result.append({
-            "center": [sum(xs)/len(xs), sum(ys)/len(ys)],
-            "positions": json.loads(repr(group)),
-            "id": ids
-        })
+    async with lock:
+        for _ in range(TILE_BUILD_ATTEMPTS):
 
-    return result
+            if tiles.is_built(date):
+                return
+
+            generation = tiles.generation(date)
+            points, _ = await async_crud.get_cluster_points(db, date)
+
+            directory = tiles.staging_dir(date)
+            await run_in_process(tiles.build_tiles, directory, points.coords, points.ids, points.sources)
+            tiles.publish(date, directory, generation)
+
+
+@app.get("/api/tiles/{date}/{z}/{x}/{y}.mvt", response_model=None)
+async def get_tile(date: str, z: int, x: int, y: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get one Mapbox Vector Tile of the fires and fire reports of a date.
+
+    The whole pyramid of the date is built on first access and served from
+    disk afterwards. Empty tiles are answered with 204.
+
+    Parameters:
+    - date (str): The date of the fire data.
+    - z (int), x (int), y (int): The tile coordinates.
+    - db (AsyncSession): The database session to use.
+    """
+    date = canonical_date(date)
+
+    if not 0 <= z <= tiles.MAX_ZOOM or not 0 <= x < 1 << z or not 0 <= y < 1 << z:
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    if not tiles.is_built(date):
+        await build_day_tiles(date, db)
+
+    try:
+        with open(tiles.tile_path(date, z, x, y), "rb") as tile:
+            content = tile.read()
+    except FileNotFoundError:
+        return Response(status_code=204)
+
+    return Response(content=content, media_type=tiles.MEDIA_TYPE)
 
 
 @app.get("/api/report", response_model=None)
-async def get_report(db: Session = Depends(get_db)):
+async def get_report(db: AsyncSession = Depends(get_async_db)):
     """
     Get fire data.
 
     Parameters:
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing fire data.
     """
-    report_data = crud.get_report(db)
+    report_data = await async_crud.get_report(db)
     return report_data
 
 
 
 @app.get("/api/report/date/{date}", response_model=None)
-async def get_report_by_date(date: str, db: Session = Depends(get_db)):
+async def get_report_by_date(date: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get fire data by date.
 
     Parameters:
     - date (str): The date of the fire data to retrieve.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing fire data.
     """
-    report_data = crud.get_report_by_date(db, date)
+    date = canonical_date(date)
+    report_data = await async_crud.get_report_by_date(db, date)
     return report_data
 
 @app.get("/api/report/manual", response_model=None)
-async def get_manual_report(db: Session = Depends(get_db)):
+async def get_manual_report(db: AsyncSession = Depends(get_async_db)):
     """
     Get fire data by date.
 
     Parameters:
     - date (str): The date of the fire data to retrieve.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing fire data.
     """
-    report_data = crud.get_manual_report(db)
+    report_data = await async_crud.get_manual_report(db)
     return report_data
 
 
 
 @app.post("/api/report", response_model=None)
 async def post_report(
-    background_tasks: BackgroundTasks,
-    latitude: str = Form(...),
-    longitude: str = Form(...),
+    response: Response,
+    latitude: float = Form(...),
+    longitude: float = Form(...),
     message: str = Form(...),
     category: str = Form(...),
     image: UploadFile = File(None),
     from_nasa: bool = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new report with latitude, longitude, message, and an uploaded image.
@@ -314,7 +500,7 @@ async def post_report(
     - longitude (float): The longitude coordinate of the report.
     - message (str): The message or description of the report.
     - image (UploadFile): The uploaded image associated with the report.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing the created report data.
@@ -329,50 +515,36 @@ async def post_report(
     }
 
     if image is not None:
-        image_data = await report_data["image"].read()
-        image_url = store_image(image_data)
-        result = crud.post_report(db, report_data, image_url)
+        image_urls = await store_upload(image)
+        result = await async_crud.post_report(db, report_data, **image_urls)
     else:
         image_url = ""
-        result = crud.post_report(db, report_data, image_url)
+        result = await async_crud.post_report(db, report_data, image_url)
     
     report_data["id"] = result.id
     report_data["image_url"] = result.image_url
     report_data["timestamp"] = str(result.timestamp)
 
-    new_task = Job()
-    jobs[new_task.uid] = new_task
-
-    request_data = json.dumps({
-        'longitude': report_data.get('longitude'),
-        'latitude': report_data.get('latitude'),
-        'message': report_data.get('message'),
-        'category': report_data.get('category'),
-        'id': report_data.get('id'),
-        'image_url': report_data.get('image_url'),
-        'timestamp': report_data.get('timestamp')
-    })
-
-    print(f"REQUESTING AI FOR {request_data}")
-
-    background_tasks.add_task(start_ai_task, new_task.uid, report_data)
+    job = await jobs.create(report_id=result.id)
+    await enrichment.submit(job.uid, report_data)
+    response.headers["X-Job-Id"] = str(job.uid)
 
     return result
 
 
 @app.get("/api/report/{report_id}", response_model=None)
-async def get_report_by_id(report_id: int, db: Session = Depends(get_db)):
+async def get_report_by_id(report_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get report data by its ID.
 
     Parameters:
     - report_id (int): The ID of the report data to retrieve.
-    - db (Session): The database session to use.
+    - db (AsyncSession): The database session to use.
 
     Returns:
     dict: A dictionary containing report data.
     """
-    report_data = crud.get_report_by_id(db, report_id)
+    report_data = await async_crud.get_report_by_id(db, report_id)
     return report_data
 
 @app.post("/api/image")
@@ -380,19 +552,18 @@ async def upload_image(image: UploadFile = File(...)):
     """
     upload image to minio with status code 200
     """
-    image_data = await image.read()
-    image_url = store_image(image_data)
-    return {"url": image_url}
+    image_urls = await store_upload(image)
+    return {"url": image_urls["image_url"], **image_urls}
 
 
 @app.patch("/api/report/{report_id}")
-async def update_report(report_id: int, latitude: str = Form(None),
-                       longitude: str = Form(None),
+async def update_report(report_id: int, latitude: float = Form(None),
+                       longitude: float = Form(None),
                        message: str = Form(None),
                        ai_message: str = Form(None),
                        new_image: UploadFile = File(None),
                        from_nasa: bool = Form(None),
-                       db: Session = Depends(get_db)):
+                       db: AsyncSession = Depends(get_async_db)):
     """
     update report data
     """
@@ -406,28 +577,74 @@ async def update_report(report_id: int, latitude: str = Form(None),
     }
 
     if new_image is not None:
-        image_data = await report_data["image"].read()
-        image_url = store_image(image_data)
-        report_data = crud.update_report(db, report_id, report_data, image_url)
+        image_urls = await store_upload(new_image)
+        report_data = await async_crud.update_report(db, report_id, report_data, **image_urls)
     else:
-        report_data = crud.update_report(db, report_id, report_data)
+        report_data = await async_crud.update_report(db, report_id, report_data)
     return report_data
 
 
 @app.get("/api/report/{lon}/{lat}", response_model=None)
-async def get_report_by_lonlat(lon: str, lat: str, db: Session = Depends(get_db)):
+async def get_report_by_lonlat(lon: float, lat: float, db: AsyncSession = Depends(get_async_db)):
 
-    report_data = crud.get_report_by_lonlat(db, lon, lat)
+    report_data = await async_crud.get_report_by_lonlat(db, lon, lat)
     return report_data
 
 @app.on_event("startup")
 async def startup_event():
     app.state.executor = ProcessPoolExecutor()
+    await enrichment.start()
+    await transactions.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await enrichment.stop()
+    await transactions.stop()
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+@app.get("/api/jobs/{uid}", response_model=None)
+async def get_job(uid: UUID):
+    """
+    Get the status of a background job, such as the AI enrichment of a
+    new report (its id is returned in the X-Job-Id header).
+
+    Parameters:
+    - uid (UUID): The job id.
+
+    Returns:
+    dict: The job id, status and report id.
+    """
+    job = await jobs.get(uid)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/enrichment", response_model=None)
+async def get_enrichment_stats():
+    """
+    Get counters of the AI enrichment worker.
+
+    Returns:
+    dict: Completed, failed, rejected and fallback counts, queue length,
+    the last known health of the AI server and the response cache hit rate.
+    """
+    return enrichment.stats()
 
 @app.get("/api/report/updat/fire/{date}", response_model=None)
-async def update_report_with_raw(date: str, db: Session = Depends(get_db)):
-    report_data = crud.update_report_with_raw(db, date)
-    return report_data
+async def update_report_with_raw(date: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create the NASA reports of a date's fires that are not reported yet.
+
+    Parameters:
+    - date (str): The date of the fires to report.
+    - db (AsyncSession): The database session to use.
+
+    Returns:
+    dict: The number of reports inserted.
+    """
+    date = canonical_date(date)
+    inserted = await async_crud.update_report_with_raw(db, date)
+    return {"inserted": inserted}
 
 def start():
     """
@@ -1,11 +1,127 @@
-import pandas as pd
-
-def get_transaction_count(secret_key):
-    url = 'https://firms.modaps.eosdis.nasa.gov/mapserver/mapkey_status/?MAP_KEY=' + secret_key
-    try:
-        df = pd.read_json(url, typ='series')
-        count = df.get('current_transactions', 0)
-    except Exception as e:
-        print("Error in our call:", str(e))
-        count = 0
-    return count
+"""
+This module keeps the FIRMS transaction count of the map key.
+
+The count is fetched from the FIRMS mapkey status URL by a background task
+every refresh interval, so requests read a cached number and never wait on
+(or spend quota with) the FIRMS API. When a refresh fails, the last known
+count keeps being served; a request that finds the count older than the
+interval serves it anyway and starts a refresh.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionCounter:
+    """
+    Cached count of the FIRMS transactions of a map key.
+
+    Args:
+        url (str): The mapkey status URL; the key is sent as MAP_KEY.
+        map_key (str): The FIRMS map key.
+        interval (float): Seconds between refreshes.
+        timeout (float): Seconds allowed for one request to FIRMS.
+        transport (httpx.AsyncBaseTransport): Transport for the HTTP
+            client, to talk to a stub server in tests.
+    """
+
+    def __init__(self, url: str, map_key: str, interval: float = 300, timeout: float = 10,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = url
+        self.map_key = map_key
+        self.interval = interval
+        self.timeout = timeout
+        self.transport = transport
+
+        self.client: Optional[httpx.AsyncClient] = None
+        self.task: Optional[asyncio.Task] = None
+        self.refreshing: Optional[asyncio.Task] = None
+        self.value = 0
+        self.fetched_at = float("-inf")
+        self.attempted_at = float("-inf")
+        self.failures = 0
+
+    async def start(self) -> None:
+        """
+        Open the HTTP client and start refreshing in the background.
+        """
+        self.client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+
+        tasks = [task for task in (self.task, self.refreshing) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = self.refreshing = None
+
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def age(self) -> float:
+
+        return time.monotonic() - self.fetched_at
+
+    async def count(self) -> int:
+        """
+        The cached transaction count.
+
+        Before the first successful fetch this waits for the fetch in
+        flight; afterwards it never waits. A count older than the interval
+        starts a refresh, at most one per interval, while the old count is
+        returned.
+        """
+        if self.client is None:
+            return self.value
+
+        if self.age() >= self.interval and time.monotonic() - self.attempted_at >= self.interval:
+            self.revalidate()
+
+        if self.fetched_at == float("-inf") and self.refreshing is not None and not self.refreshing.done():
+            await asyncio.shield(self.refreshing)
+
+        return self.value
+
+    def revalidate(self) -> asyncio.Task:
+        """
+        Start a refresh unless one is already running.
+        """
+        if self.refreshing is None or self.refreshing.done():
+            self.attempted_at = time.monotonic()
+            self.refreshing = asyncio.create_task(self.refresh())
+        return self.refreshing
+
+    async def refresh(self) -> None:
+        """
+        Fetch the count from FIRMS; on failure the last count is kept.
+        """
+        try:
+            response = await self.client.get(self.url, params={"MAP_KEY": self.map_key})
+            response.raise_for_status()
+            self.value = int(response.json().get("current_transactions") or 0)
+        except (httpx.HTTPError, ValueError, TypeError, AttributeError):
+            self.failures += 1
+            logger.warning("Fetching the FIRMS transaction count failed", exc_info=True)
+            return
+
+        self.fetched_at = time.monotonic()
+
+    def stats(self) -> dict:
+
+        return {
+            "transaction_count": self.value,
+            "age": self.age() if self.fetched_at != float("-inf") else None,
+            "failures": self.failures,
+        }
+
+    async def _run(self) -> None:
+
+        while True:
+            await self.revalidate()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,210 @@
+"""
+This module records database usage per request.
+
+Engine event listeners count the queries a request runs and how long they
+take, and a pool subclass times how long each connection checkout waited.
+The totals are aggregated per route so N+1 regressions (queries per
+request creeping up) and pool starvation (checkout waits) are visible.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class RequestStats:
+    """
+    Database usage of one request.
+    """
+    __slots__ = ("queries", "query_time", "checkouts", "checkout_wait")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.checkouts = 0
+        self.checkout_wait = 0.0
+
+
+class RouteStats:
+    """
+    Database usage of every finished request of one route.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.query_time = 0.0
+        self.max_query_time = 0.0
+        self.checkouts = 0
+        self.checkout_wait = 0.0
+        self.max_checkout_wait = 0.0
+
+    def add(self, stats: RequestStats) -> None:
+        self.requests += 1
+        self.queries += stats.queries
+        self.max_queries = max(self.max_queries, stats.queries)
+        self.query_time += stats.query_time
+        self.max_query_time = max(self.max_query_time, stats.query_time)
+        self.checkouts += stats.checkouts
+        self.checkout_wait += stats.checkout_wait
+        self.max_checkout_wait = max(self.max_checkout_wait, stats.checkout_wait)
+
+    def to_dict(self) -> dict:
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": self.queries / requests,
+            "max_queries": self.max_queries,
+            "query_seconds": self.query_time,
+            "max_query_seconds": self.max_query_time,
+            "checkouts": self.checkouts,
+            "checkout_wait_seconds": self.checkout_wait,
+            "max_checkout_wait_seconds": self.max_checkout_wait,
+        }
+
+
+class DatabaseMetrics:
+    """
+    Process wide database counters, split by route.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = {}
+        self.queries = 0
+        self.query_time = 0.0
+        self.checkouts = 0
+        self.checkout_wait = 0.0
+        self.max_checkout_wait = 0.0
+        self.lock = threading.Lock()
+        self.current: ContextVar[Optional[RequestStats]] = ContextVar("db_request_stats", default=None)
+
+    def record_query(self, duration: float) -> None:
+
+        stats = self.current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += duration
+
+        with self.lock:
+            self.queries += 1
+            self.query_time += duration
+
+    def record_checkout(self, wait: float) -> None:
+
+        stats = self.current.get()
+        if stats is not None:
+            stats.checkouts += 1
+            stats.checkout_wait += wait
+
+        with self.lock:
+            self.checkouts += 1
+            self.checkout_wait += wait
+            self.max_checkout_wait = max(self.max_checkout_wait, wait)
+
+    def start_request(self) -> RequestStats:
+        """
+        Attach fresh counters to the current context.
+        """
+        stats = RequestStats()
+        self.current.set(stats)
+        return stats
+
+    def finish_request(self, route: str, stats: RequestStats) -> None:
+
+        with self.lock:
+            self.routes.setdefault(route, RouteStats()).add(stats)
+
+    def stats(self) -> dict:
+
+        with self.lock:
+            return {
+                "queries": self.queries,
+                "query_seconds": self.query_time,
+                "checkouts": self.checkouts,
+                "checkout_wait_seconds": self.checkout_wait,
+                "max_checkout_wait_seconds": self.max_checkout_wait,
+                "routes": {route: stats.to_dict() for route, stats in sorted(self.routes.items())},
+            }
+
+
+db_metrics = DatabaseMetrics()
+
+
+def instrument_engine(engine: Engine, metrics: DatabaseMetrics = db_metrics) -> None:
+    """
+    Time every statement run on engine (use AsyncEngine.sync_engine for async engines).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.record_query(time.perf_counter() - conn.info["query_started"].pop())
+
+
+def timed_pool(pool_class: type, metrics: DatabaseMetrics = db_metrics) -> type:
+    """
+    Subclass pool_class so every checkout records how long it waited.
+
+    The wait covers queueing for a free connection and opening a new one,
+    which is where pool exhaustion shows up.
+    """
+
+    class TimedPool(pool_class):
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.record_checkout(time.perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def pool_status(pool: Pool) -> dict:
+    """
+    Describe the current occupancy of a connection pool.
+    """
+    status = {"class": type(pool).__name__, "status": pool.status()}
+
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+
+    return status
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware giving every HTTP request its own database counters.
+
+    Pure ASGI rather than BaseHTTPMiddleware, so queries run while a
+    streaming response is sent are still attributed to the request.
+    """
+
+    def __init__(self, app, metrics: DatabaseMetrics = db_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = self.metrics.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.metrics.finish_request(f"{scope['method']} {path}", stats)
@@ -0,0 +1,116 @@
+"""
+This module upgrades existing databases to the current models.
+
+`Base.metadata.create_all` only creates missing tables, so column type changes
+and indexes added to tables that already exist are applied here. Every step
+inspects the live schema first, so it is safe to run on every startup.
+"""
+from sqlalchemy import String, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from app.src.grid import cell_of
+
+NUMBER_PATTERN = r"^\s*[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?\s*$"
+DATE_PATTERN = r"^\s*[0-9]{4}-[0-9]{2}-[0-9]{2}\s*$"
+
+# (table, column, PostgreSQL type, pattern a stored string must match to be cast)
+COLUMN_TYPES = [
+    ("fires", "latitude", "double precision", NUMBER_PATTERN),
+    ("fires", "longitude", "double precision", NUMBER_PATTERN),
+    ("fires", "acq_date", "date", DATE_PATTERN),
+    ("reports", "latitude", "double precision", NUMBER_PATTERN),
+    ("reports", "longitude", "double precision", NUMBER_PATTERN),
+]
+
+# (table, column, SQL type) added to tables created before the column existed
+ADDED_COLUMNS = [
+    ("fires", "cell", "INTEGER"),
+    ("reports", "cell", "INTEGER"),
+    ("reports", "thumbnail_url", "VARCHAR"),
+    ("reports", "preview_url", "VARCHAR"),
+]
+
+# Rows whose grid cell is filled in per statement while backfilling.
+BACKFILL_BATCH = 10000
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_fires_acq_date", "fires", ["acq_date"]),
+    ("ix_fires_longitude_latitude", "fires", ["longitude", "latitude"]),
+    ("ix_reports_longitude_latitude", "reports", ["longitude", "latitude"]),
+    ("ix_reports_category_timestamp", "reports", ["category", "timestamp"]),
+    ("ix_fires_acq_date_cell", "fires", ["acq_date", "cell"]),
+    ("ix_reports_cell", "reports", ["cell"]),
+]
+
+
+def migrate(engine: Engine) -> None:
+    """
+    Bring the fires and reports tables of an existing database up to date.
+
+    On PostgreSQL, coordinate and date columns still stored as strings are
+    converted in place; values that do not parse become NULL. SQLite cannot
+    alter column types, so only new columns and indexes are added there.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine of the database to upgrade.
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+
+    with engine.begin() as connection:
+
+        if engine.dialect.name == "postgresql":
+            for table, column, sql_type, pattern in COLUMN_TYPES:
+                if table not in tables:
+                    continue
+
+                columns = {info["name"]: info["type"] for info in inspector.get_columns(table)}
+                if not isinstance(columns.get(column), String):
+                    continue
+
+                connection.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {sql_type} "
+                    f"USING CASE WHEN {column} ~ '{pattern}' THEN trim({column})::{sql_type} END"
+                ))
+
+        for table, column, sql_type in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+
+            if column in {info["name"] for info in inspector.get_columns(table)}:
+                continue
+
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+
+            if column == "cell":
+                _backfill_cells(connection, table)
+
+        for name, table, columns in INDEXES:
+            if table in tables:
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                ))
+
+
+def _backfill_cells(connection: Connection, table: str) -> None:
+    """
+    Fill in the grid cell of rows stored before the cell column existed.
+    """
+    rows = connection.execute(text(
+        f"SELECT id, longitude, latitude FROM {table} "
+        "WHERE cell IS NULL AND longitude IS NOT NULL AND latitude IS NOT NULL"
+    )).fetchall()
+
+    updates = []
+
+    for row_id, longitude, latitude in rows:
+        try:
+            updates.append({"id": row_id, "cell": cell_of(float(longitude), float(latitude))})
+        except ValueError:
+            continue
+
+    for start in range(0, len(updates), BACKFILL_BATCH):
+        connection.execute(
+            text(f"UPDATE {table} SET cell = :cell WHERE id = :id"),
+            updates[start:start + BACKFILL_BATCH]
+        )
@@ -1,6 +1,6 @@
 """Module containing SQLAlchemy models for the Fire and Report tables."""
 
-from sqlalchemy import Column, Float, Integer, String, Boolean, TIMESTAMP
+from sqlalchemy import Column, Date, Double, Float, Index, Integer, String, Boolean, TIMESTAMP
 from app.database import Base
 
 class Fire(Base):
@@ -15,28 +15,34 @@ class Fire(Base):
         brightness (float): The brightness level of the fire.
         scan (float): The scan value.
         track (float): The track value.
-        acq_date (str): The acquisition date of the fire.
+        acq_date (date): The acquisition date of the fire.
         acq_time (int): The acquisition time of the fire.
         confidence (int): The confidence level of the fire.
         bright_t31 (float): The bright_t31 value.
         frp (float): The frp (Fire Radiative Power) value.
         daynight (str): The day or night indicator.
+        cell (int): The id of the spatial grid cell containing the fire.
 
     """
     __tablename__ = "fires"
+    __table_args__ = (
+        Index("ix_fires_longitude_latitude", "longitude", "latitude"),
+        Index("ix_fires_acq_date_cell", "acq_date", "cell"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     country_id = Column(String, unique=True, index=True)
-    latitude = Column(String)
-    longitude = Column(String)
+    latitude = Column(Double)
+    longitude = Column(Double)
     brightness = Column(Float)
     scan = Column(Float)
     track = Column(Float)
-    acq_date = Column(String)
+    acq_date = Column(Date, index=True)
     acq_time = Column(Integer)
     confidence = Column(Integer)
     bright_t31 = Column(Float)
     frp = Column(Float)
     daynight = Column(String)
+    cell = Column(Integer)
 
 class Report(Base):
     """
@@ -47,17 +53,61 @@ class Report(Base):
         latitude (float): The latitude coordinate associated with the report.
         longitude (float): The longitude coordinate associated with the report.
         image_url (str): The URL of the image associated with the report.
+        thumbnail_url (str): The URL of a 256px thumbnail of the image.
+        preview_url (str): The URL of a 1024px version of the image.
         message (str): The message or description of the report.
         timestamp (TIMESTAMP): The timestamp when the report was created.
+        cell (int): The id of the spatial grid cell containing the report.
 
     """
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_longitude_latitude", "longitude", "latitude"),
+        Index("ix_reports_category_timestamp", "category", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    latitude = Column(String)
-    longitude = Column(String)
+    latitude = Column(Double)
+    longitude = Column(Double)
     image_url = Column(String)
+    thumbnail_url = Column(String)
+    preview_url = Column(String)
     message = Column(String)
     category = Column(String)
     ai_message = Column(String)
     from_nasa = Column(Boolean)
     timestamp = Column(TIMESTAMP)
+    cell = Column(Integer, index=True)
+
+class JobRecord(Base):
+    """
+    SQLAlchemy model for the Job table, used by the SQL job store.
+
+    Attributes:
+        uid (str): The job id.
+        status (str): in_progress, completed, failed or rejected.
+        report_id (int): The report the job enriches.
+        updated_at (TIMESTAMP): When the status last changed; rows older
+            than the job TTL are expired.
+
+    """
+    __tablename__ = "jobs"
+    uid = Column(String, primary_key=True)
+    status = Column(String)
+    report_id = Column(Integer)
+    updated_at = Column(TIMESTAMP, index=True)
+
+class AIResponse(Base):
+    """
+    SQLAlchemy model for the AI response cache table.
+
+    Attributes:
+        key (str): SHA-256 of the normalized (category, message, image hash).
+        response (str): The message the AI server answered.
+        last_used (TIMESTAMP): When the entry was last stored or read from
+            the table; the least recently used rows are trimmed first.
+
+    """
+    __tablename__ = "ai_responses"
+    key = Column(String, primary_key=True)
+    response = Column(String)
+    last_used = Column(TIMESTAMP, index=True)
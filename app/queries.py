@@ -0,0 +1,328 @@
+"""
+Statements and row formatting shared by the crud modules.
+
+Everything here only builds SQLAlchemy statements or turns rows into
+GeoJSON; app.async_crud runs them on an AsyncSession and app.crud on a
+Session.
+"""
+import json
+from datetime import date as Date, datetime, timedelta
+from typing import List
+import geojson
+from sqlalchemy import TIMESTAMP, String, and_, cast, func, insert, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import Fire, Report
+from app.src.types import FIRE, REPORT
+from app.src.grid import cell_of, cell_ranges
+
+# Rows fetched per round trip and features written per chunk when streaming.
+STREAM_BATCH = 1000
+
+# Rows per multi-row upsert statement; 14 columns each stays well below the
+# 32767 bound parameters PostgreSQL and SQLite allow.
+UPSERT_BATCH = 1000
+
+# Decimal places kept in coordinates, matching geojson's default precision.
+GEOJSON_PRECISION = 6
+
+
+def date_of(timestamp) -> str:
+    return str(timestamp).split(' ')[0]
+
+def parse_date(value) -> Date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, Date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def new_fire(data: object) -> Fire:
+    return Fire(
+        country_id = data.get("country_id"),
+        latitude = data.get("latitude"),
+        longitude = data.get("longitude"),
+        brightness = data.get("brightness"),
+        scan = data.get("scan"),
+        track = data.get("track"),
+        acq_date = parse_date(data.get("acq_date")),
+        acq_time = data.get("acq_time"),
+        confidence = data.get("confidence"),
+        bright_t31 = data.get("bright_t31"),
+        frp = data.get("frp"),
+        daynight = data.get("daynight"),
+        cell = cell_of(data.get("longitude"), data.get("latitude"))
+    )
+
+def fire_batch_rows(records: List[dict]) -> List[dict]:
+    rows = {}
+    for record in records:
+        rows[record["country_id"]] = {
+            **record,
+            "acq_date": parse_date(record["acq_date"]),
+            "cell": cell_of(record["longitude"], record["latitude"]),
+        }
+    return list(rows.values())
+
+def stored_dates_queries(rows: List[dict]):
+    keys = [row["country_id"] for row in rows]
+    for start in range(0, len(keys), STREAM_BATCH):
+        yield select(Fire.acq_date).where(Fire.country_id.in_(keys[start:start + STREAM_BATCH])).distinct()
+
+def fire_batch_statements(dialect_name: str, rows: List[dict]):
+    """
+    Multi-row INSERT ... ON CONFLICT (country_id) DO UPDATE statements for
+    rows, UPSERT_BATCH rows each, returning (country_id, id) of every row.
+
+    One VALUES list per statement instead of executemany: RETURNING with
+    executemany is not supported by every driver (asyncpg), and it keeps
+    the bound parameters under the drivers' limits.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+
+    for start in range(0, len(rows), UPSERT_BATCH):
+        statement = dialect.insert(Fire).values(rows[start:start + UPSERT_BATCH])
+        yield statement.on_conflict_do_update(
+            index_elements=[Fire.country_id],
+            set_={column: statement.excluded[column] for column in rows[0] if column != "country_id"},
+        ).returning(Fire.country_id, Fire.id)
+
+def fire_collection(data: Fire) -> dict:
+    features = []
+    point = geojson.Point((float(data.longitude), float(data.latitude), 0))
+    properties = {
+        # "id": data.id,
+        # "country_id": data.country_id,
+        # "brightness": data.brightness,
+        # "scan": data.scan,
+        # "track": data.track,
+        # "acq_date": data.acq_date,
+        # "acq_time": data.acq_time,
+        # "confidence": data.confidence,
+        # "bright_t31": data.bright_t31,
+        # "frp": data.frp,
+        # "daynight": data.daynight,
+    }
+
+    feature = geojson.Feature(geometry=point, properties=properties)
+    features.append(feature)
+    feature_collection = geojson.FeatureCollection(features)
+
+    geojson_string = geojson.dumps(feature_collection, sort_keys=True)
+    geojson_dict = json.loads(geojson_string)
+    return geojson_dict
+
+def cluster_queries(start: str, end: str = None):
+    end = end or start
+    first = datetime.strptime(start, '%Y-%m-%d')
+    last = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)
+
+    fire_query = (
+        select(Fire.id, Fire.longitude, Fire.latitude, Fire.acq_date)
+        .where(and_(Fire.acq_date >= first.date(), Fire.acq_date < last.date()))
+        .where(and_(Fire.longitude.is_not(None), Fire.latitude.is_not(None)))
+        .order_by(Fire.id)
+    )
+    report_query = (
+        select(Report.id, Report.longitude, Report.latitude, Report.timestamp)
+        .where(and_(Report.timestamp > first, Report.timestamp < last))
+        .where(Report.category == 'fire-report')
+        .where(and_(Report.longitude.is_not(None), Report.latitude.is_not(None)))
+        .order_by(Report.id)
+    )
+
+    return (fire_query, FIRE), (report_query, REPORT)
+
+def feature_json(longitude: float, latitude: float, properties: dict) -> str:
+    return json.dumps({
+        "geometry": {
+            "coordinates": [round(float(longitude), GEOJSON_PRECISION), round(float(latitude), GEOJSON_PRECISION), 0],
+            "type": "Point"
+        },
+        "properties": properties,
+        "type": "Feature"
+    }, sort_keys=True, separators=(",", ":"))
+
+def report_properties(report) -> dict:
+    return {
+        "id": report.id,
+        "message": report.message,
+        "image_url": report.image_url,
+        "thumbnail_url": report.thumbnail_url,
+        "acq_time": str(report.timestamp),
+        "acq_date": str(report.timestamp).split(' ')[0],
+        "src": "report"
+    }
+
+class FeatureChunks:
+    """
+    Joins serialized features into comma separated pieces of STREAM_BATCH.
+    """
+    HEAD = '{"features":['
+    TAIL = '],"type":"FeatureCollection"}'
+
+    def __init__(self):
+        self.chunk = []
+        self.first = True
+
+    def add(self, feature: str):
+        self.chunk.append(feature)
+        if len(self.chunk) == STREAM_BATCH:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self.chunk:
+            return None
+        piece = ("" if self.first else ",") + ",".join(self.chunk)
+        self.chunk, self.first = [], False
+        return piece
+
+def day_queries(date: str):
+    start = datetime.strptime(date, '%Y-%m-%d')
+    end = start + timedelta(days=1)
+
+    fire_query = (
+        select(Fire.longitude, Fire.latitude)
+        .where(Fire.acq_date == parse_date(date))
+        .where(and_(Fire.longitude.is_not(None), Fire.latitude.is_not(None)))
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+    report_query = (
+        select(Report.id, Report.longitude, Report.latitude, Report.message, Report.image_url,
+               Report.thumbnail_url, Report.timestamp)
+        .where(and_(Report.timestamp > start, Report.timestamp < end))
+        .where(Report.category == 'fire-report')
+        .where(and_(Report.longitude.is_not(None), Report.latitude.is_not(None)))
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+
+    return fire_query, report_query
+
+def bbox_filter(model, bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    cells = or_(*[model.cell.between(start, stop) for start, stop in cell_ranges(*bbox)])
+
+    if min_lon <= max_lon:
+        longitude = model.longitude.between(min_lon, max_lon)
+    else:
+        longitude = or_(model.longitude >= min_lon, model.longitude <= max_lon)
+
+    return and_(cells, longitude, model.latitude.between(min_lat, max_lat))
+
+def bbox_queries(date: str, bbox: tuple):
+    start = datetime.strptime(date, '%Y-%m-%d')
+    end = start + timedelta(days=1)
+
+    fire_query = (
+        select(Fire)
+        .where(Fire.acq_date == parse_date(date))
+        .where(bbox_filter(Fire, bbox))
+    )
+    report_query = (
+        select(Report)
+        .where(and_(Report.timestamp > start, Report.timestamp < end))
+        .where(Report.category == 'fire-report')
+        .where(bbox_filter(Report, bbox))
+    )
+
+    return fire_query, report_query
+
+def bbox_collection(fires, reports):
+    features = []
+
+    for data in fires:
+        point = geojson.Point((float(data.longitude), float(data.latitude), 0))
+        features.append(geojson.Feature(geometry=point, properties={}))
+
+    for report in reports:
+        point = geojson.Point((float(report.longitude), float(report.latitude), 0))
+        features.append(geojson.Feature(geometry=point, properties=report_properties(report)))
+
+    return geojson.FeatureCollection(features)
+
+def new_report(report_data: object, image_url: str = None,
+                thumbnail_url: str = None, preview_url: str = None) -> Report:
+    return Report(
+        latitude=report_data["latitude"],
+        longitude=report_data["longitude"],
+        image_url=image_url,
+        thumbnail_url=thumbnail_url,
+        preview_url=preview_url,
+        category=report_data["category"],
+        message=report_data["message"],
+        timestamp=datetime.now() - timedelta(days=1),
+        from_nasa = report_data["from_nasa"],
+        cell = cell_of(report_data["longitude"], report_data["latitude"])
+    )
+
+def report_range_query(start_date: str, end_date: str, only_fire: bool = False):
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+
+    query = select(Report).where(and_(Report.timestamp > start, Report.timestamp < end))
+    if only_fire:
+        query = query.where(Report.category == 'fire-report')
+    return query
+
+def apply_report_update(existing_report: Report, report_data: object, image_url: str = None,
+                         thumbnail_url: str = None, preview_url: str = None) -> None:
+    if report_data.get("latitude") is not None:
+        existing_report.latitude = report_data["latitude"]
+    if report_data.get("longitude") is not None:
+        existing_report.longitude = report_data["longitude"]
+    if report_data.get("message") is not None:
+        existing_report.message = report_data["message"]
+    if report_data.get("ai_message") is not None:
+        existing_report.ai_message = report_data["ai_message"]
+    if report_data.get("category") is not None:
+        existing_report.category = report_data["category"]
+    if image_url is not None:
+        existing_report.image_url = image_url
+        existing_report.thumbnail_url = thumbnail_url
+        existing_report.preview_url = preview_url
+    if report_data.get("from_nasa") is not None:
+        existing_report.from_nasa = report_data["from_nasa"]
+    existing_report.cell = cell_of(existing_report.longitude, existing_report.latitude)
+
+def as_text(column):
+    return func.coalesce(cast(column, String), "None")
+
+def raw_report_insert(day: Date):
+    timestamp = literal(datetime.combine(day, datetime.min.time()), TIMESTAMP)
+
+    message = (
+        literal(f"This is a fire reported by NASA FIRMS on {day} at [")
+        + as_text(Fire.longitude) + ", " + as_text(Fire.latitude)
+        + "], which has a confidence level of " + as_text(Fire.confidence)
+        + "%. The pixel-integrated fire radiative power is " + as_text(Fire.frp)
+        + " MW, and the brightness temperature measured (in Kelvin) of channel 21/22 is " + as_text(Fire.brightness)
+        + ", while channel 31 recoreds a temperature of " + as_text(Fire.bright_t31) + "."
+    )
+
+    reported = (
+        select(Report.id)
+        .where(Report.from_nasa.is_(True))
+        .where(Report.longitude == Fire.longitude)
+        .where(Report.latitude == Fire.latitude)
+        .where(Report.timestamp == timestamp)
+    )
+
+    fires = (
+        select(
+            Fire.latitude,
+            Fire.longitude,
+            literal("string"),
+            message,
+            literal(True),
+            timestamp,
+            Fire.cell,
+        )
+        .where(Fire.acq_date == day)
+        .where(~reported.exists())
+    )
+
+    return insert(Report).from_select(
+        ["latitude", "longitude", "image_url", "message", "from_nasa", "timestamp", "cell"],
+        fires,
+    )
@@ -1,43 +1,172 @@
-import uuid
+"""
+This module stores report images in the S3 (MinIO) bucket.
+
+One Minio client, with its pooled HTTP connections, is shared by the whole
+process. Uploads from request handlers run on a small thread pool: the photo
+is decoded from the spooled upload file, and its recompressed renditions are
+stored under related object names, so the event loop is never blocked.
+
+Objects are named after the SHA-256 of the uploaded bytes. A photo that is
+already stored (a retried upload, or a PATCH re-sending the same file) is
+neither decoded nor uploaded again.
+"""
+import asyncio
+import hashlib
 import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Dict
+import urllib3
+from fastapi import HTTPException, UploadFile
 from minio import Minio
+from minio.error import S3Error
 from app import config
+from app import images
+
+settings = config.Settings()
+
+# Connections kept open to the object store, and threads uploading to it.
+POOL_SIZE = settings.S3_POOL_SIZE
+
+# Bytes hashed per read of the upload file.
+HASH_CHUNK = 1024 * 1024
+
+# Digests remembered as stored, so repeats skip the stat_object round trip.
+KNOWN_OBJECTS = 10000
+
+CONTENT_TYPE = images.CONTENT_TYPE
+
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="s3-upload")
+
+_known: "OrderedDict[str, None]" = OrderedDict()
+_known_lock = threading.Lock()
+
+
+@lru_cache()
+def get_client() -> Minio:
+    """
+    Get the process wide Minio client.
+    """
+    return Minio(
+        settings.S3_ENDPOINT_URL,
+        access_key=settings.S3_ACCESS_KEY_ID,
+        secret_key=settings.S3_SECRET_ACCESS_KEY,
+        secure=True,
+        http_client=urllib3.PoolManager(
+            maxsize=POOL_SIZE,
+            timeout=urllib3.Timeout(connect=10, read=60),
+            retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        ),
+    )
+
+
+def object_url(object_name: str) -> str:
+
+    return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{object_name}"
+
+
+def object_names(digest: str) -> Dict[str, str]:
+    """
+    Object name of every rendition of an upload, keyed by report column.
+    """
+    names = {"image_url": f"{digest}.jpg"}
+    for column, size in images.THUMBNAILS:
+        names[column] = f"{digest}_{size}.jpg"
+    return names
 
 
-def store_image(image):
+def content_digest(file: BinaryIO) -> str:
+    """
+    SHA-256 of a file, read HASH_CHUNK bytes at a time; the file is rewound.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
 
-    # Get S3 bucket settings from config
-    settings = config.Settings()
-    S3_ENDPOINT_URL = settings.S3_ENDPOINT_URL
-    S3_BUCKET_NAME = settings.S3_BUCKET_NAME
-    S3_ACCESS_KEY_ID = settings.S3_ACCESS_KEY_ID
-    S3_SECRET_ACCESS_KEY = settings.S3_SECRET_ACCESS_KEY
 
-    # Initialize Minio client
+def _remember(digest: str) -> None:
+
+    with _known_lock:
+        _known[digest] = None
+        _known.move_to_end(digest)
+        while len(_known) > KNOWN_OBJECTS:
+            _known.popitem(last=False)
+
+
+def is_stored(digest: str) -> bool:
+    """
+    Whether the renditions of digest are already in the bucket.
+
+    The full-size image is uploaded last, so its presence means every
+    rendition is there.
+    """
+    with _known_lock:
+        if digest in _known:
+            _known.move_to_end(digest)
+            return True
+
     try:
-        client = Minio(
-            S3_ENDPOINT_URL,
-            access_key=S3_ACCESS_KEY_ID,
-            secret_key=S3_SECRET_ACCESS_KEY,
-            secure=True
-        )
-    except Exception as e:
-        raise e
+        get_client().stat_object(settings.S3_BUCKET_NAME, object_names(digest)["image_url"])
+    except S3Error as error:
+        if error.code in ("NoSuchKey", "NoSuchObject", "ResourceNotFound"):
+            return False
+        raise
+
+    _remember(digest)
+    return True
+
+
+def store_renditions(file: BinaryIO) -> Dict[str, str]:
+    """
+    Recompress an image, make its thumbnails and upload all of them,
+    unless the same bytes were stored before.
+
+    The full-size image is stored as <sha256>.jpg and each thumbnail as
+    <sha256>_<size>.jpg.
+
+    Args:
+        file (BinaryIO): The uploaded image.
+
+    Returns:
+        dict: The URL of every rendition, keyed by report column.
+    """
+    digest = content_digest(file)
+    names = object_names(digest)
+
+    if not is_stored(digest):
+        renditions = images.render(file)
+
+        for column in sorted(renditions, key=lambda column: column == "image_url"):
+            data = renditions[column]
+            get_client().put_object(
+                settings.S3_BUCKET_NAME,
+                names[column],
+                io.BytesIO(data),
+                length=len(data),
+                content_type=CONTENT_TYPE,
+            )
+
+        _remember(digest)
+
+    return {column: object_url(name) for column, name in names.items()}
+
 
-    # Convert image data to bytes
-    image_bytes = io.BytesIO(image)
+async def store_upload(upload: UploadFile) -> Dict[str, str]:
+    """
+    Store a request's image and its thumbnails on the upload thread pool.
 
-    # Create object name
-    object_name = f"{uuid.uuid4()}.jpg"
+    Returns:
+        dict: The URL of every rendition, keyed by report column
+            (image_url, preview_url, thumbnail_url).
+    """
+    await upload.seek(0)
 
+    loop = asyncio.get_running_loop()
     try:
-        result = client.put_object(
-            S3_BUCKET_NAME,
-            object_name,
-            image_bytes,
-            length=len(image),
-            content_type='image/jpeg'
-        )
-        return f"{S3_ENDPOINT_URL}/{S3_BUCKET_NAME}/{object_name}"
-    except Exception as e:
-        raise e
+        return await loop.run_in_executor(_executor, store_renditions, upload.file)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
@@ -1,21 +1,21 @@
-"""Module containing the Pydantic Fire model."""
+"""Module containing the Pydantic Fire models."""
 
+from datetime import date
 from pydantic import BaseModel
 
 
-class Fire(BaseModel):
+class FireCreate(BaseModel):
     """
-    Pydantic model representing a fire event.
+    Pydantic model representing a submitted fire event, before it has an id.
 
     Attributes:
-        id (int): The unique identifier for the fire event.
         country_id (str): The country identifier.
         latitude (float): The latitude coordinate of the fire.
         longitude (float): The longitude coordinate of the fire.
         brightness (float): The brightness level of the fire.
         scan (float): The scan value.
         track (float): The track value.
-        acq_date (str): The acquisition date of the fire.
+        acq_date (date): The acquisition date of the fire.
         acq_time (int): The acquisition time of the fire.
         confidence (int): The confidence level of the fire.
         bright_t31 (float): The bright_t31 value.
@@ -23,16 +23,26 @@ class Fire(BaseModel):
         daynight (str): The day or night indicator.
 
     """
-    id: int
     country_id: str
-    latitude: str
-    longitude: str
+    latitude: float
+    longitude: float
     brightness: float
     scan: float
     track: float
-    acq_date: str
+    acq_date: date
     acq_time: int
     confidence: int
     bright_t31: float
     frp: float
     daynight: str
+
+
+class Fire(FireCreate):
+    """
+    Pydantic model representing a fire event.
+
+    Attributes:
+        id (int): The unique identifier for the fire event.
+
+    """
+    id: int
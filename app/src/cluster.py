@@ -0,0 +1,168 @@
+from typing import List
+
+import numpy as np
+
+# Candidate pairs generated per batch while scanning neighbor cells.
+CHUNK_SIZE = 1 << 20
+
+# Points per cell compared in the first, sampled pass over neighbor cells.
+SAMPLE_SIZE = 16
+
+# Cells are slightly smaller than threshold / sqrt(2) so that any two points
+# sharing a cell are strictly closer than the threshold, even after rounding.
+CELL_SCALE = (1 - 1e-9) / np.sqrt(2)
+
+# Forward half of the 5x5 cell neighborhood; the other half is symmetric.
+OFFSETS = [(0, 1), (0, 2)] + [(dx, dy) for dx in (1, 2) for dy in range(-2, 3)]
+
+
+def threshold_labels(coords: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Label every point with its single-linkage cluster.
+
+    Two points end up in the same cluster when they are connected by a chain
+    of points whose consecutive distances are below ``threshold``, which is
+    exactly the grouping of an MST cut at ``threshold``. Points are bucketed
+    into a uniform grid and only neighboring cells are compared, so the cost
+    grows with the number of close pairs instead of N².
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    size = len(coords)
+
+    if size == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    cells = np.floor(coords / (threshold * CELL_SCALE)).astype(np.int64)
+    cells -= cells.min(axis=0)
+    width = int(cells[:, 1].max()) + 5
+    keys = cells[:, 0] * width + cells[:, 1] + 2
+
+    order = np.argsort(keys, kind="stable")
+    uniq, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    cell_of = np.repeat(np.arange(len(uniq)), counts)
+    sorted_coords = coords[order]
+
+    pairs_a = []
+    pairs_b = []
+
+    for dx, dy in OFFSETS:
+
+        target = uniq + dx * width + dy
+        found = np.searchsorted(uniq, target)
+        found[found == len(uniq)] = 0
+        exists = uniq[found] == target
+
+        pairs_a.append(np.flatnonzero(exists))
+        pairs_b.append(found[exists])
+
+    pair_a = np.concatenate(pairs_a)
+    pair_b = np.concatenate(pairs_b)
+    cell_labels = np.arange(len(uniq))
+    edges_a = []
+    edges_b = []
+
+    # A cheap pass over a few points per cell connects most dense neighbors;
+    # only the pairs it leaves apart are compared exhaustively.
+    for limit in (SAMPLE_SIZE, None):
+
+        used = counts if limit is None else np.minimum(counts, limit)
+        todo = np.arange(len(pair_a))
+
+        if limit is None:
+            todo = todo[(counts[pair_a] > SAMPLE_SIZE) | (counts[pair_b] > SAMPLE_SIZE)]
+
+        cost = used[pair_a[todo]] * used[pair_b[todo]]
+        position = 0
+
+        while position < len(todo):
+
+            # Cells that are already connected need no further point comparisons.
+            alive = cell_labels[pair_a[todo[position:]]] != cell_labels[pair_b[todo[position:]]]
+            spent = np.cumsum(np.where(alive, cost[position:], 0))
+            stop = position + max(int(np.searchsorted(spent, CHUNK_SIZE, side="right")), 1)
+
+            batch = todo[position + np.flatnonzero(alive[:stop - position])]
+            position = stop
+
+            if len(batch) == 0:
+                continue
+
+            a, b, pair = _candidate_pairs(starts[pair_a[batch]], used[pair_a[batch]],
+                                          starts[pair_b[batch]], used[pair_b[batch]])
+
+            delta = sorted_coords[a] - sorted_coords[b]
+            close = np.sqrt(np.einsum("ij,ij->i", delta, delta)) < threshold
+
+            hit = np.zeros(len(batch), dtype=bool)
+            hit[pair[close]] = True
+
+            if hit.any():
+                edges_a.append(pair_a[batch[hit]])
+                edges_b.append(pair_b[batch[hit]])
+                cell_labels = connected_components(len(uniq), np.concatenate(edges_a), np.concatenate(edges_b))
+
+    labels = np.empty(size, dtype=np.intp)
+    labels[order] = cell_labels[cell_of]
+    return labels
+
+
+def _candidate_pairs(start_a: np.ndarray, count_a: np.ndarray, start_b: np.ndarray, count_b: np.ndarray):
+    """
+    Expand cell pairs into every (a, b) point pair between the two cells,
+    along with the index of the cell pair each point pair came from.
+    """
+    cost = count_a * count_b
+    pair = np.repeat(np.arange(len(cost)), cost)
+    k = np.arange(int(cost.sum())) - np.repeat(np.cumsum(cost) - cost, cost)
+
+    width = count_b[pair]
+    a = start_a[pair] + k // width
+    b = start_b[pair] + k % width
+
+    return a, b, pair
+
+
+def connected_components(size: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Label the connected components of an undirected graph given as edge arrays.
+
+    Every vertex gets the smallest vertex index of its component.
+    """
+    labels = np.arange(size)
+
+    while True:
+
+        la = labels[a]
+        lb = labels[b]
+        low = np.minimum(la, lb)
+
+        hooked = labels.copy()
+        np.minimum.at(hooked, la, low)
+        np.minimum.at(hooked, lb, low)
+
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+
+        if np.array_equal(hooked, labels):
+            return labels
+
+        labels = hooked
+
+
+def groups_from_labels(labels: np.ndarray) -> List[np.ndarray]:
+    """
+    Split point indices by label, ordered by the first point of each group.
+    """
+    labels = np.asarray(labels)
+
+    if len(labels) == 0:
+        return []
+
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    groups = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+
+    return [groups[k] for k in np.argsort(first)]
@@ -0,0 +1,26 @@
+import numpy as np
+
+
+def distance_matrix(coords: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Build the pairwise euclidean distance matrix of an (N, 2) coordinate array.
+
+    Coordinates are centered before the cast so that float32 keeps enough
+    precision for degree-scale thresholds.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    coords = (coords - coords.mean(axis=0)).astype(dtype) if len(coords) else coords.astype(dtype)
+
+    x = coords[:, 0]
+    y = coords[:, 1]
+
+    matrix = np.subtract.outer(x, x)
+    np.square(matrix, out=matrix)
+
+    dy = np.subtract.outer(y, y)
+    np.square(dy, out=dy)
+    matrix += dy
+    del dy
+
+    np.sqrt(matrix, out=matrix)
+    return matrix
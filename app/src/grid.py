@@ -0,0 +1,73 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# Size in degrees of the cells stored in the `cell` column of fires and reports.
+CELL_SIZE = 0.5
+COLUMNS = int(360 / CELL_SIZE)
+ROWS = int(180 / CELL_SIZE)
+
+# Above this many ranges a bbox query falls back to one covering range.
+MAX_RANGES = 128
+
+
+def _column(longitude: float) -> int:
+
+    return min(max(int((longitude + 180) // CELL_SIZE), 0), COLUMNS - 1)
+
+
+def _row(latitude: float) -> int:
+
+    return min(max(int((latitude + 90) // CELL_SIZE), 0), ROWS - 1)
+
+
+def cell_of(longitude: float, latitude: float) -> int:
+    """
+    Id of the grid cell containing a point; cells are numbered row by row
+    from (-180, -90).
+    """
+    if longitude is None or latitude is None:
+        return None
+
+    return _row(float(latitude)) * COLUMNS + _column(float(longitude))
+
+
+def cells_of(longitudes: np.ndarray, latitudes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized cell_of for arrays of coordinates.
+    """
+    columns = np.clip(np.floor((np.asarray(longitudes, dtype=np.float64) + 180) / CELL_SIZE), 0, COLUMNS - 1)
+    rows = np.clip(np.floor((np.asarray(latitudes, dtype=np.float64) + 90) / CELL_SIZE), 0, ROWS - 1)
+
+    return (rows * COLUMNS + columns).astype(np.int64)
+
+
+def cell_ranges(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> List[Tuple[int, int]]:
+    """
+    Inclusive cell id ranges covering a bounding box.
+
+    A box with min_lon > max_lon crosses the antimeridian.
+    """
+    rows = range(_row(min_lat), _row(max_lat) + 1)
+
+    if min_lon <= max_lon:
+        spans = [(_column(min_lon), _column(max_lon))]
+    else:
+        spans = [(_column(min_lon), COLUMNS - 1), (0, _column(max_lon))]
+
+    ranges = []
+
+    for row in rows:
+        for first, last in spans:
+
+            start, stop = row * COLUMNS + first, row * COLUMNS + last
+
+            if ranges and ranges[-1][1] + 1 == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+
+    if len(ranges) > MAX_RANGES:
+        return [(ranges[0][0], ranges[-1][1])]
+
+    return ranges
@@ -1,50 +1,50 @@
 from typing import List
 
+import numpy as np
+
+from app.src.distance import distance_matrix
+from app.src.types import PositionArray
+
 class Graph():
-    def __init__(self, vertices):
+    def __init__(self, vertices, graph: np.ndarray = None):
+
+        if isinstance(vertices, PositionArray):
+            graph = distance_matrix(vertices.coords) if graph is None else graph
+            vertices = len(vertices)
+
         self.V = vertices
-        self.graph = [[0 for _ in range(vertices)] for _ in range(vertices)]
- 
+        self.graph = np.zeros((vertices, vertices)) if graph is None else np.asarray(graph)
+
     def genMST(self, parent) -> List[tuple[int, int, float]]:
 
         result = []
 
         for i in range(1, self.V):
-            result.append((parent[i], i, self.graph[i][parent[i]]))
+            result.append((int(parent[i]), i, float(self.graph[i, parent[i]])))
 
         return result
 
     def minKey(self, key, mstSet):
- 
-        min = 1e9
- 
-        for v in range(self.V):
-            if key[v] < min and mstSet[v] == False:
-                min = key[v]
-                min_index = v
- 
-        return min_index
- 
-
-    def primMST(self) -> List[tuple[int, int]]:
-
-        key = [1e9] * self.V
-        parent = [None] * self.V  
+
+        return int(np.argmin(np.where(mstSet, np.inf, key)))
+
+
+    def primMST(self) -> List[tuple[int, int, float]]:
+
+        key = np.full(self.V, np.inf)
+        parent = np.full(self.V, -1, dtype=np.intp)
         key[0] = 0
-        mstSet = [False] * self.V
- 
-        parent[0] = -1
- 
+        mstSet = np.zeros(self.V, dtype=bool)
+
         for _ in range(self.V):
 
             u = self.minKey(key, mstSet)
 
             mstSet[u] = True
 
-            for v in range(self.V):
+            row = self.graph[u]
+            update = ~mstSet & (row < key)
+            key[update] = row[update]
+            parent[update] = u
 
-                if self.graph[u][v] > 0 and mstSet[v] == False and key[v] > self.graph[u][v]:
-                    key[v] = self.graph[u][v]
-                    parent[v] = u
- 
-        return self.genMST(parent)
\ No newline at end of file
+        return self.genMST(parent)
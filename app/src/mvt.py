@@ -0,0 +1,98 @@
+"""
+Minimal Mapbox Vector Tile encoder for point layers.
+
+Only what the fire layers need is implemented: one layer per tile, point
+geometries, and string/integer properties.
+"""
+from typing import Dict, List, Tuple
+
+EXTENT = 4096
+
+POINT = 1
+MOVE_TO = 1
+
+
+def _varint(value: int) -> bytes:
+
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes(field: int, payload: bytes) -> bytes:
+
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _uint(field: int, value: int) -> bytes:
+
+    return _key(field, 0) + _varint(value)
+
+
+def _packed(field: int, values: List[int]) -> bytes:
+
+    return _bytes(field, b"".join(_varint(value) for value in values))
+
+
+def _value(value) -> bytes:
+
+    if isinstance(value, bool):
+        return _uint(7, int(value))
+    if isinstance(value, int):
+        return _key(6, 0) + _varint(_zigzag(value))
+    return _bytes(1, str(value).encode())
+
+
+def encode_layer(name: str, points: List[Tuple[int, int, Dict[str, object]]], extent: int = EXTENT) -> bytes:
+    """
+    Encode a tile holding one layer of points.
+
+    Args:
+        name (str): The layer name.
+        points (list): (x, y, properties) tuples in tile coordinates.
+        extent (int): The tile extent the coordinates are expressed in.
+
+    Returns:
+        bytes: The encoded tile.
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    features = []
+
+    for x, y, properties in points:
+
+        tags = []
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+
+        feature = b""
+        if tags:
+            feature += _packed(2, tags)
+        feature += _uint(3, POINT)
+        feature += _packed(4, [(1 << 3) | MOVE_TO, _zigzag(int(x)), _zigzag(int(y))])
+        features.append(_bytes(2, feature))
+
+    layer = _uint(15, 2) + _bytes(1, name.encode())
+    layer += b"".join(features)
+    layer += b"".join(_bytes(3, key.encode()) for key in keys)
+    layer += b"".join(_bytes(4, _value(value)) for _, value in values)
+    layer += _uint(5, extent)
+
+    return _bytes(3, layer)
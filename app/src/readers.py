@@ -1,19 +1,24 @@
 from typing import List
 
-from app.src.types import Position
+from app.src.types import Position, PositionArray
 
 class AlgoReader:
 
     def __init__(self):
         self.DATA: List[List[int]] = [[]]
+        self.IDS: List[int] = None
+        self.SOURCES: List[str] = None
         self.POSITIONS: List[Position] = []
 
-    def get_data(self) -> List[Position]:
-  
+    def get_array(self) -> PositionArray:
+
         self._get_data()
 
-        for data in self.DATA:
-            self.POSITIONS.append(Position(data))
+        return PositionArray(self.DATA, self.IDS, self.SOURCES)
+
+    def get_data(self) -> List[Position]:
+
+        self.POSITIONS = list(self.get_array())
 
         return self.POSITIONS
 
@@ -22,9 +27,21 @@ class AlgoReader:
 
 class INPUT(AlgoReader):
 
-    def __init__(self, data: List[List[int]]):
+    def __init__(self, data: List[List[int]], ids: List[int] = None, sources: List[str] = None):
         super().__init__()
         self.DATA = data
+        self.IDS = ids
+        self.SOURCES = sources
+
+class ARRAY(AlgoReader):
+
+    def __init__(self, positions: PositionArray):
+        super().__init__()
+        self.ARRAY = positions
+
+    def get_array(self) -> PositionArray:
+
+        return self.ARRAY
 
 class DEFAULT(AlgoReader):
 
@@ -1,15 +1,25 @@
 import math
 from typing import List
 
+import numpy as np
+
+# Source tables a clustered point can come from.
+FIRE = "fire"
+REPORT = "report"
+
 class Position:
 
-    def __init__(self, loc: List[float]):
+    __slots__ = ("x", "y", "id", "source")
+
+    def __init__(self, loc: List[float], id: int = None, source: str = None):
 
         if len(loc) != 2:
             raise ValueError
         
         self.x = loc[0]
         self.y = loc[1]
+        self.id = id
+        self.source = source
 
     def toInt(self, resolution: int):
 
@@ -24,8 +34,120 @@ class Position:
     
     def __mul__(self, other):
 
-        return Position([self.x * other, self.y * other])
+        return Position([self.x * other, self.y * other], self.id, self.source)
     
     def __repr__(self):
 
-        return f"[{self.x}, {self.y}]"
\ No newline at end of file
+        return f"[{self.x}, {self.y}]"
+
+
+class PositionArray:
+    """
+    Compact (N, 2) float64 array of positions with optional id and source columns.
+
+    Indexing with an int returns a Position view of that row; slices, masks and
+    index arrays return a new PositionArray.
+    """
+
+    __slots__ = ("coords", "ids", "sources")
+
+    def __init__(self, coords, ids=None, sources=None):
+
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64)
+        self.sources = None if sources is None else np.asarray(sources, dtype=str)
+
+        if self.ids is not None and len(self.ids) != len(self.coords):
+            raise ValueError
+        if self.sources is not None and len(self.sources) != len(self.coords):
+            raise ValueError
+
+    @classmethod
+    def from_positions(cls, positions: List[Position]):
+
+        coords = [[pos.x, pos.y] for pos in positions]
+        ids = [pos.id for pos in positions]
+        sources = [pos.source for pos in positions]
+
+        return cls(
+            coords,
+            None if None in ids else ids,
+            None if None in sources else sources
+        )
+
+    @classmethod
+    def concatenate(cls, arrays: List["PositionArray"]):
+
+        ids = [array.ids for array in arrays]
+        sources = [array.sources for array in arrays]
+
+        return cls(
+            np.concatenate([array.coords for array in arrays]),
+            None if any(column is None for column in ids) else np.concatenate(ids),
+            None if any(column is None for column in sources) else np.concatenate(sources)
+        )
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    def __len__(self):
+
+        return len(self.coords)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, (int, np.integer)):
+            return Position(
+                [float(self.coords[index, 0]), float(self.coords[index, 1])],
+                None if self.ids is None else int(self.ids[index]),
+                None if self.sources is None else str(self.sources[index])
+            )
+
+        return self.take(index)
+
+    def __iter__(self):
+
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices):
+
+        return PositionArray(
+            self.coords[indices],
+            None if self.ids is None else self.ids[indices],
+            None if self.sources is None else self.sources[indices]
+        )
+
+    def select(self, source: str) -> np.ndarray:
+        """
+        Ids of the rows that came from ``source``.
+        """
+        if self.ids is None or self.sources is None:
+            return np.zeros(0, dtype=np.int64)
+
+        return self.ids[self.sources == source]
+
+    def center(self) -> List[float]:
+
+        return self.coords.mean(axis=0).tolist()
+
+    def toInt(self, resolution: int):
+
+        return PositionArray(
+            np.trunc(self.coords * resolution),
+            self.ids,
+            self.sources
+        )
+
+    def __mul__(self, other):
+
+        return PositionArray(self.coords * other, self.ids, self.sources)
+
+    def __repr__(self):
+
+        return "[" + ", ".join(f"[{x}, {y}]" for x, y in self.coords.tolist()) + "]"
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class DisjointSet:
+    """
+    Union-find over integer indices with path compression and union by rank.
+    """
+
+    def __init__(self, size: int = 0):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self) -> int:
+
+        index = len(self.parent)
+        self.parent.append(index)
+        self.rank.append(0)
+        return index
+
+    def find(self, index: int) -> int:
+
+        root = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+
+        return root
+
+    def union(self, a: int, b: int) -> int:
+
+        a = self.find(a)
+        b = self.find(b)
+
+        if a == b:
+            return a
+
+        if self.rank[a] < self.rank[b]:
+            a, b = b, a
+
+        self.parent[b] = a
+        if self.rank[a] == self.rank[b]:
+            self.rank[a] += 1
+
+        return a
+
+    def labels(self) -> np.ndarray:
+        """
+        Root of every index, resolved by pointer jumping over the parent array.
+        """
+        labels = np.array(self.parent, dtype=np.intp)
+
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                return labels
+            labels = jumped
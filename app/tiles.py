@@ -0,0 +1,176 @@
+"""
+This module builds and stores the vector tile pyramid of a day's fires.
+
+Tiles for a date are built once, written under TILE_DIR/<date>/<z>/<x>/<y>.mvt
+and served from disk until a fire or report on that date changes. <date> is
+always the zero-padded YYYY-MM-DD form, the one invalidate is called with.
+
+Any change drops the whole pyramid of the date, so a day that keeps
+receiving fires or reports is rebuilt on the next tile request after each
+of them.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+from app import config
+from app.src.mvt import EXTENT, encode_layer
+from app.src.types import REPORT
+
+settings = config.Settings()
+TILE_DIR = settings.TILE_DIR
+MAX_ZOOM = settings.TILE_MAX_ZOOM
+
+LAYER = "fires"
+MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# Below MAX_ZOOM, fires closer than this many tile units (one pixel of a
+# 256px tile) are merged into one feature carrying their count.
+THIN_UNITS = EXTENT // 256
+
+MAX_LATITUDE = 85.05112878
+
+_generations = {}
+_lock = threading.Lock()
+
+# Deletes invalidated pyramids off the caller's thread, which is usually the
+# event loop.
+_cleaner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tile-cleanup")
+
+
+def date_dir(date: str) -> str:
+
+    return os.path.join(TILE_DIR, date)
+
+
+def tile_path(date: str, z: int, x: int, y: int) -> str:
+
+    return os.path.join(date_dir(date), str(z), str(x), f"{y}.mvt")
+
+
+def is_built(date: str) -> bool:
+
+    return os.path.isdir(date_dir(date))
+
+
+def generation(date: str) -> int:
+    """
+    Counter that changes every time the tiles of date are invalidated.
+    """
+    with _lock:
+        return _generations.get(date, 0)
+
+
+def invalidate(date: str) -> None:
+    """
+    Drop the stored tiles of date so they are rebuilt on the next request.
+
+    The pyramid is renamed out of the way, which is immediate, and deleted
+    on a background thread.
+    """
+    with _lock:
+        _generations[date] = _generations.get(date, 0) + 1
+
+        if not os.path.isdir(date_dir(date)):
+            return
+
+        stale = tempfile.mkdtemp(dir=TILE_DIR, prefix=f".{date}-stale-")
+        try:
+            os.replace(date_dir(date), os.path.join(stale, date))
+        except FileNotFoundError:
+            pass
+
+    _cleaner.submit(shutil.rmtree, stale, ignore_errors=True)
+
+
+def staging_dir(date: str) -> str:
+    """
+    Create an empty directory next to the published tiles to build into.
+    """
+    os.makedirs(TILE_DIR, exist_ok=True)
+    return tempfile.mkdtemp(dir=TILE_DIR, prefix=f".{date}-")
+
+
+def publish(date: str, directory: str, built_generation: int) -> bool:
+    """
+    Move a finished build into place, unless the date changed while it ran
+    or another build was published first.
+    """
+    with _lock:
+        if built_generation != _generations.get(date, 0) or os.path.isdir(date_dir(date)):
+            shutil.rmtree(directory, ignore_errors=True)
+            return False
+
+        os.replace(directory, date_dir(date))
+        return True
+
+
+def build_tiles(directory: str, positions: List[List[float]], ids: List[int], sources: List[str],
+                max_zoom: int = MAX_ZOOM) -> int:
+    """
+    Write every non-empty tile from zoom 0 to max_zoom into directory.
+
+    Fire reports are always kept as individual features. Fires are thinned
+    below max_zoom. Defined at module level so it can run in a process pool.
+
+    Returns:
+        int: The number of tiles written.
+    """
+    coords = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    ids = np.asarray(ids, dtype=np.int64)
+    is_report = np.asarray(sources, dtype=str) == REPORT
+
+    latitude = np.radians(np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+    mx = (coords[:, 0] + 180) / 360
+    my = (1 - np.log(np.tan(latitude) + 1 / np.cos(latitude)) / np.pi) / 2
+
+    written = 0
+
+    for z in range(max_zoom + 1):
+
+        scale = EXTENT << z
+        gx = np.clip((mx * scale).astype(np.int64), 0, scale - 1)
+        gy = np.clip((my * scale).astype(np.int64), 0, scale - 1)
+        counts = np.ones(len(coords), dtype=np.int64)
+        keep = np.ones(len(coords), dtype=bool)
+
+        if z < max_zoom:
+            fires = np.flatnonzero(~is_report)
+            cells = (gx[fires] // THIN_UNITS) * (scale // THIN_UNITS) + gy[fires] // THIN_UNITS
+            _, first, inverse, sizes = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+            keep[fires] = False
+            keep[fires[first]] = True
+            counts[fires[first]] = sizes[inverse[first]]
+
+        selected = np.flatnonzero(keep)
+        tiles = (gx[selected] // EXTENT) * (1 << z) + gy[selected] // EXTENT
+        order = np.argsort(tiles, kind="stable")
+        selected, tiles = selected[order], tiles[order]
+        bounds = np.flatnonzero(np.diff(tiles)) + 1
+
+        for members in np.split(selected, bounds):
+
+            if len(members) == 0:
+                continue
+
+            x, y = int(gx[members[0]] // EXTENT), int(gy[members[0]] // EXTENT)
+            points = []
+
+            for i in members.tolist():
+                if is_report[i]:
+                    properties = {"src": "report", "id": int(ids[i])}
+                else:
+                    properties = {"src": "firm", "count": int(counts[i])}
+                points.append((gx[i] % EXTENT, gy[i] % EXTENT, properties))
+
+            path = os.path.join(directory, str(z), str(x), f"{y}.mvt")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as tile:
+                tile.write(encode_layer(LAYER, points))
+
+            written += 1
+
+    return written
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Settings are read when app modules are imported, so the test environment
+# has to be in place before any test module imports them.
+_directory = tempfile.mkdtemp(prefix="nasa-backend-tests-")
+
+os.environ.setdefault("MAP_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_directory}/test.sqlite")
+os.environ.setdefault("S3_ENDPOINT_URL", "localhost:9000")
+os.environ.setdefault("S3_BUCKET_NAME", "test")
+os.environ.setdefault("S3_ACCESS_KEY_ID", "test")
+os.environ.setdefault("S3_SECRET_ACCESS_KEY", "test")
+os.environ.setdefault("TILE_DIR", os.path.join(_directory, "tiles"))
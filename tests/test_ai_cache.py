@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.ai_cache import AIResponseCache, cache_key, image_digest
+from app.database import AsyncSessionLocal, create_tables
+
+DIGEST = hashlib.sha256(b"image bytes").hexdigest()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+
+    create_tables()
+
+
+def test_cache_key_ignores_case_and_whitespace():
+
+    assert cache_key("fire-report", "Smoke on\nthe  ridge ", None) == cache_key("Fire-Report", "smoke on the ridge", "")
+
+
+def test_cache_key_depends_on_every_part():
+
+    key = cache_key("fire-report", "smoke", None)
+
+    assert cache_key("other", "smoke", None) != key
+    assert cache_key("fire-report", "flames", None) != key
+    assert cache_key("fire-report", "smoke", f"http://s3/bucket/{DIGEST}.jpg") != key
+
+
+def test_image_digest_is_read_from_stored_object_names():
+
+    assert image_digest(f"http://s3/bucket/{DIGEST}.jpg") == DIGEST
+    assert image_digest(f"http://other-host/bucket/{DIGEST}_256.jpg?x=1") == DIGEST
+    assert image_digest("http://example.com/photo.jpg") == hashlib.sha256(b"http://example.com/photo.jpg").hexdigest()
+    assert image_digest("") == ""
+
+
+def test_answers_survive_in_the_table():
+
+    key = cache_key("fire-report", "cached in the table", None)
+
+    async def put_then_get():
+        await AIResponseCache(AsyncSessionLocal).put(key, "stay away")
+        cache = AIResponseCache(AsyncSessionLocal)
+        return await cache.get(key), await cache.get(key), await cache.get("missing"), cache.stats()
+
+    first, second, missing, stats = asyncio.run(put_then_get())
+
+    assert first == second == "stay away"
+    assert missing is None
+    assert (stats["table_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
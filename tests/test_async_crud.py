@@ -0,0 +1,99 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app import async_crud
+from app.database import AsyncSessionLocal, create_tables
+from app.models import Fire, Report
+from app.queries import UPSERT_BATCH, fire_batch_rows, fire_batch_statements
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+
+    create_tables()
+
+
+def test_post_report_stores_a_datetime_timestamp():
+
+    report = {
+        "latitude": 35.0,
+        "longitude": -120.0,
+        "category": "fire-report",
+        "message": "smoke on the ridge",
+        "from_nasa": False,
+    }
+
+    async def post_and_read():
+        async with AsyncSessionLocal() as db:
+            created = await async_crud.post_report(db, report, image_url="https://example.com/a.jpg")
+        async with AsyncSessionLocal() as db:
+            return created, await async_crud.get_report_by_id(db, created.id)
+
+    created, stored = asyncio.run(post_and_read())
+
+    assert isinstance(stored.timestamp, datetime)
+    assert stored.message == "smoke on the ridge"
+    assert stored.image_url == "https://example.com/a.jpg"
+    assert stored.cell == created.cell is not None
+
+
+def test_stream_fire_by_date_skips_rows_without_coordinates():
+
+    async def stream():
+        async with AsyncSessionLocal() as db:
+            db.add(Report(latitude=None, longitude=None, category="fire-report", message="lost",
+                          from_nasa=False, timestamp=datetime(2023, 10, 5, 12)))
+            db.add(Report(latitude=35.0, longitude=-120.0, category="fire-report", message="found",
+                          from_nasa=False, timestamp=datetime(2023, 10, 5, 13)))
+            await db.commit()
+
+            return "".join([piece async for piece in async_crud.stream_fire_by_date(db, "2023-10-05")])
+
+    collection = json.loads(asyncio.run(stream()))
+
+    assert [feature["properties"]["message"] for feature in collection["features"]] == ["found"]
+
+
+def fire(country_id: str, longitude: float, acq_date: str = "2023-10-07") -> dict:
+
+    return {
+        "country_id": country_id, "latitude": 35.0, "longitude": longitude, "brightness": 300.0,
+        "scan": 1.0, "track": 1.0, "acq_date": acq_date, "acq_time": 1200, "confidence": 80,
+        "bright_t31": 290.0, "frp": 5.0, "daynight": "D",
+    }
+
+
+def test_post_fire_batch_upserts_many_records():
+
+    async def post(records):
+        async with AsyncSessionLocal() as db:
+            return await async_crud.post_fire_batch(db, records)
+
+    first = asyncio.run(post([fire("batch-a", -120.0), fire("batch-b", -121.0), fire("batch-c", -122.0)]))
+    second = asyncio.run(post([fire("batch-c", -122.5), fire("batch-d", -123.0), fire("batch-a", -120.5)]))
+
+    assert first["upserted"] == 3 and len(set(first["ids"])) == 3
+    assert second["ids"] == [first["ids"][2], second["ids"][1], first["ids"][0]]
+
+    async def longitudes():
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(select(Fire.country_id, Fire.longitude).where(Fire.country_id.like("batch-%")))
+            return dict(rows.all())
+
+    assert asyncio.run(longitudes()) == {"batch-a": -120.5, "batch-b": -121.0, "batch-c": -122.5, "batch-d": -123.0}
+
+
+def test_fire_batch_statements_use_one_values_list_per_chunk():
+
+    rows = fire_batch_rows([fire(f"chunk-{i}", -120.0) for i in range(UPSERT_BATCH + 1)])
+    statements = list(fire_batch_statements("postgresql", rows))
+
+    assert len(statements) == 2
+    sql = str(statements[1].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (country_id) DO UPDATE" in sql
+    assert sql.endswith("RETURNING fires.country_id, fires.id")
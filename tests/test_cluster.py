@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.src.cluster import threshold_labels
+from app.src.unionfind import DisjointSet
+
+
+def brute_force_labels(coords: np.ndarray, threshold: float) -> np.ndarray:
+
+    sets = DisjointSet(len(coords))
+    delta = coords[:, None, :] - coords[None, :, :]
+    close = np.sqrt((delta ** 2).sum(axis=-1)) < threshold
+
+    for a, b in zip(*np.nonzero(np.triu(close, k=1))):
+        sets.union(int(a), int(b))
+
+    return sets.labels()
+
+
+def canonical(labels: np.ndarray) -> list:
+    """
+    Relabel every point with the first index of its group, so partitions
+    can be compared regardless of the label values.
+    """
+    first = {}
+    return [first.setdefault(label, i) for i, label in enumerate(np.asarray(labels).tolist())]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_points_match_brute_force(seed):
+
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(1, 400))
+    coords = rng.uniform(-5, 5, size=(size, 2))
+    threshold = float(rng.uniform(0.05, 1.0))
+
+    assert canonical(threshold_labels(coords, threshold)) == canonical(brute_force_labels(coords, threshold))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dense_points_match_brute_force(seed):
+
+    # Many points per grid cell, so the exhaustive pass after the sampled
+    # one is exercised.
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-120, -110, size=(8, 2))
+    coords = np.concatenate([center + rng.normal(scale=0.05, size=(150, 2)) for center in centers])
+
+    for threshold in (0.005, 0.02, 0.2):
+        assert canonical(threshold_labels(coords, threshold)) == canonical(brute_force_labels(coords, threshold))
+
+
+def test_points_exactly_at_threshold_stay_apart():
+
+    coords = np.array([[0.0, 0.0], [0.2, 0.0], [0.5, 0.0], [0.5, 0.0]])
+
+    assert canonical(threshold_labels(coords, 0.2)) == canonical(brute_force_labels(coords, 0.2))
+
+
+def test_empty_input():
+
+    assert len(threshold_labels(np.zeros((0, 2)), 0.2)) == 0
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app import async_crud
+from app.ai_cache import AIResponseCache
+from app.database import AsyncSessionLocal, create_tables
+from app.enrichment import COMPLETED, DEFAULT_MESSAGE, REJECTED, EnrichmentWorker
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+
+    create_tables()
+
+
+def ai_server(calls, status=200, healthy=True):
+
+    async def handler(request):
+        if request.url.path == "/api/llava":
+            if status != 200:
+                calls.append(None)
+                return httpx.Response(status)
+            payload = json.loads(request.content)
+            calls.append(payload["id"])
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"response": f"about {payload['message']}"})
+        return httpx.Response(200 if healthy else 503)
+
+    return httpx.MockTransport(handler)
+
+
+def test_identical_reports_in_flight_share_one_ai_request():
+
+    calls = []
+    reports = [
+        {"id": 1, "category": "fire-report", "message": "smoke on the ridge"},
+        {"id": 2, "category": "fire-report", "message": "Smoke  on the ridge"},
+        {"id": 3, "category": "fire-report", "message": "flames by the road"},
+    ]
+
+    async def describe_all():
+        worker = EnrichmentWorker("http://ai", session_factory=None, transport=ai_server(calls))
+        await worker.start()
+        try:
+            return await asyncio.gather(*(worker.describe(report) for report in reports))
+        finally:
+            await worker.stop()
+
+    messages = asyncio.run(describe_all())
+
+    assert sorted(calls) == [1, 3]
+    assert messages == ["about smoke on the ridge"] * 2 + ["about flames by the road"]
+
+
+def enrich(message, transport, cache=None):
+    """
+    Store a report, enrich it with a worker and return the stored report,
+    the statuses reported and the worker's counters.
+    """
+    statuses = []
+
+    async def on_status(uid, status):
+        statuses.append(status)
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            report = await async_crud.post_report(db, {
+                "latitude": 35.0, "longitude": -120.0, "category": "fire-report",
+                "message": message, "from_nasa": False,
+            })
+
+        worker = EnrichmentWorker("http://ai", AsyncSessionLocal, on_status=on_status,
+                                  transport=transport, cache=cache)
+        await worker.start()
+        try:
+            assert await worker.submit("job", {"id": report.id, "message": message, "category": "fire-report"})
+            await worker.join()
+        finally:
+            await worker.stop()
+
+        async with AsyncSessionLocal() as db:
+            return await async_crud.get_report_by_id(db, report.id), statuses, worker.counters
+
+    return asyncio.run(run())
+
+
+def test_answers_are_stored_and_cached():
+
+    calls = []
+    cache = AIResponseCache(AsyncSessionLocal)
+
+    first, statuses, counters = enrich("ash falling downtown", ai_server(calls), cache)
+    second, _, _ = enrich("Ash falling  downtown", ai_server(calls), cache)
+
+    assert first.ai_message == second.ai_message == "about ash falling downtown"
+    assert len(calls) == 1
+    assert statuses == [COMPLETED]
+    assert counters["fallbacks"] == 0
+
+
+def test_failed_ai_requests_fall_back_and_are_not_cached():
+
+    calls = []
+    cache = AIResponseCache(AsyncSessionLocal)
+
+    report, statuses, counters = enrich("a failing request", ai_server(calls, status=500), cache)
+    enrich("a failing request", ai_server(calls, status=500), cache)
+
+    assert report.ai_message == DEFAULT_MESSAGE
+    assert statuses == [COMPLETED]
+    assert counters["fallbacks"] == 1
+    assert len(calls) == 2
+
+
+def test_unhealthy_ai_server_is_not_asked():
+
+    calls = []
+
+    report, _, counters = enrich("nobody answers", ai_server(calls, healthy=False))
+
+    assert report.ai_message == DEFAULT_MESSAGE
+    assert counters["fallbacks"] == 1
+    assert calls == []
+
+
+def test_reports_beyond_the_queue_size_are_rejected():
+
+    statuses = []
+
+    async def on_status(uid, status):
+        statuses.append((uid, status))
+
+    async def run():
+        worker = EnrichmentWorker("", session_factory=None, queue_size=1, on_status=on_status)
+        await worker.start()
+        try:
+            return [await worker.submit(uid, {"id": uid}) for uid in ("first", "second")], worker.stats()
+        finally:
+            await worker.stop()
+
+    accepted, stats = asyncio.run(run())
+
+    assert accepted == [True, False]
+    assert statuses == [("second", REJECTED)]
+    assert stats[REJECTED] == 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.group import Group
+from app.src.readers import ARRAY
+from app.src.types import FIRE, REPORT, PositionArray
+
+
+def random_points(rng, size: int) -> PositionArray:
+
+    centers = rng.uniform(-5, 5, size=(6, 2))
+    coords = centers[rng.integers(0, len(centers), size)] + rng.normal(scale=0.3, size=(size, 2))
+    sources = np.where(rng.random(size) < 0.5, FIRE, REPORT)
+
+    return PositionArray(coords, np.arange(size), sources)
+
+
+def partition(clusters: list) -> set:
+
+    return {
+        frozenset([(FIRE, i) for i in cluster["id"]] + [(REPORT, i) for i in cluster["report_id"]])
+        for cluster in clusters
+    }
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_inserts_match_full_recluster(seed):
+
+    rng = np.random.default_rng(seed)
+    points = random_points(rng, 300)
+    split = int(rng.integers(0, len(points)))
+
+    groups = Group(ARRAY(points.take(np.arange(split))), incremental=True)
+    groups.clusters()
+
+    for i in range(split, len(points)):
+        groups.insert(points[i])
+
+    assert partition(groups.clusters()) == partition(Group(ARRAY(points)).clusters())
+
+
+def test_insert_skips_known_points():
+
+    points = PositionArray([[-120, 35], [-119.9, 35]], [1, 2], [FIRE, FIRE])
+
+    groups = Group(ARRAY(points.take(np.arange(1))), incremental=True)
+    groups.clusters()
+
+    assert groups.insert(points[0]) is None
+    assert groups.insert(points[1]) is not None
+    assert groups.insert(points[1]) is None
+
+    assert groups.clusters() == Group(ARRAY(points)).clusters()
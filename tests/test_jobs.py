@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal, create_tables
+from app.jobs import IN_PROGRESS, MemoryJobStore, SqlJobStore
+from app.models import JobRecord
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+
+    create_tables()
+
+
+def test_memory_store_forgets_jobs_after_their_ttl(monkeypatch):
+
+    now = [1000.0]
+    monkeypatch.setattr("app.jobs.time.monotonic", lambda: now[0])
+    store = MemoryJobStore(ttl=60)
+
+    async def run():
+        job = await store.create(report_id=7)
+        now[0] += 30
+        await store.set_status(job.uid, "completed")
+        now[0] += 45
+        kept = await store.get(job.uid)
+        now[0] += 60
+        return kept, await store.get(job.uid)
+
+    kept, expired = asyncio.run(run())
+
+    assert (kept.status, kept.report_id) == ("completed", 7)
+    assert expired is None
+
+
+def test_memory_store_keeps_at_most_max_entries():
+
+    store = MemoryJobStore(max_entries=2)
+
+    async def run():
+        uids = [(await store.create()).uid for _ in range(3)]
+        return [await store.get(uid) for uid in uids]
+
+    oldest, *newest = asyncio.run(run())
+
+    assert oldest is None
+    assert [job.status for job in newest] == [IN_PROGRESS, IN_PROGRESS]
+
+
+def test_sql_store_ignores_and_deletes_expired_jobs():
+
+    store = SqlJobStore(AsyncSessionLocal, ttl=60)
+
+    async def run():
+        old = await store.create(report_id=1)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(JobRecord)
+                .where(JobRecord.uid == str(old.uid))
+                .values(updated_at=datetime.utcnow() - timedelta(seconds=120))
+            )
+            await db.commit()
+
+        expired = await store.get(old.uid)
+        new = await store.create(report_id=2)
+        async with AsyncSessionLocal() as db:
+            deleted = await db.get(JobRecord, str(old.uid)) is None
+
+        return expired, deleted, await store.get(new.uid)
+
+    expired, deleted, new = asyncio.run(run())
+
+    assert expired is None
+    assert deleted
+    assert (new.status, new.report_id) == (IN_PROGRESS, 2)
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/fire/date/abc",
+    "/api/fire/raw/2023-13-01",
+    "/api/fire?bbox=-130,30,0,40&date=abc",
+    "/api/fire/raw?start=abc&end=2023-10-02",
+    "/api/report/date/abc",
+    "/api/report/updat/fire/abc",
+    "/api/tiles/abc/0/0/0.mvt",
+])
+def test_malformed_dates_are_rejected(url):
+
+    response = client.get(url)
+
+    assert response.status_code == 400
+    assert "YYYY-MM-DD" in response.json()["detail"]
+
+
+def test_dates_without_zero_padding_are_accepted():
+
+    assert client.get("/api/report/date/2023-10-1").status_code == 200
+
+
+@pytest.mark.parametrize("body", [
+    b'[{"country_id": "a"}, {"country_id": "b"}, {"country_id": "c"}]',
+    b'{"country_id": "a"}\n{"country_id": "b"}\n{"country_id": "c"}\n',
+])
+def test_oversized_fire_batches_are_rejected_before_validation(monkeypatch, body):
+
+    monkeypatch.setattr("app.main.MAX_FIRE_BATCH", 2)
+
+    assert client.post("/api/fire/batch", content=body).status_code == 413
+
+
+def test_transaction_stats_before_the_first_fetch():
+
+    assert client.get("/api/transactions").json() == {"transaction_count": 0, "age": None, "failures": 0}
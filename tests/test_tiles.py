@@ -0,0 +1,35 @@
+import os
+
+from app import tiles
+from app.src.types import FIRE, REPORT
+
+
+def build(date: str) -> None:
+
+    directory = tiles.staging_dir(date)
+    tiles.build_tiles(directory, [[-120.0, 35.0], [-119.0, 36.0]], [1, 2], [FIRE, REPORT], max_zoom=3)
+    assert tiles.publish(date, directory, tiles.generation(date))
+
+
+def test_invalidate_drops_the_pyramid_and_deletes_it_in_the_background():
+
+    build("2023-10-01")
+    assert os.path.isfile(tiles.tile_path("2023-10-01", 0, 0, 0))
+
+    tiles.invalidate("2023-10-01")
+
+    assert not tiles.is_built("2023-10-01")
+    tiles._cleaner.submit(lambda: None).result()
+    assert [name for name in os.listdir(tiles.TILE_DIR) if "2023-10-01" in name] == []
+
+
+def test_a_build_started_before_invalidate_is_not_published():
+
+    date = "2023-10-02"
+    generation = tiles.generation(date)
+    directory = tiles.staging_dir(date)
+
+    tiles.invalidate(date)
+
+    assert not tiles.publish(date, directory, generation)
+    assert not tiles.is_built(date)